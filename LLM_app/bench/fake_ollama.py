@@ -0,0 +1,130 @@
+"""Fake Ollama server for benchmarking LLM_app without a GPU.
+
+Speaks the parts of the Ollama HTTP API that ChatOllama and the app use
+(/api/chat, /api/generate, /api/embed, /api/tags, /api/version) with
+configurable time-to-first-token, token rate and error injection.
+
+    python fake_ollama.py --port 11434 --ttft 0.2 --tokens-per-sec 50 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = "the quick brown fox jumps over a lazy dog while local models stream tokens".split()
+
+
+class FakeConfig:
+    ttft = 0.2  # seconds before the first token
+    tokens_per_sec = 50.0
+    num_tokens = 64
+    error_rate = 0.0  # share of requests failing with a 500
+    midstream_error_rate = 0.0  # share of streams cut off halfway
+    seed = 0
+
+
+config = FakeConfig()
+app = FastAPI(title="Fake Ollama")
+rng = random.Random(config.seed)
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def chunk(model: str, content: str, done: bool = False, **extra) -> bytes:
+    body = {"model": model, "created_at": now(), "message": {"role": "assistant", "content": content}, "done": done}
+    body.update(extra)
+    return (json.dumps(body) + "\n").encode()
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    if rng.random() < config.error_rate:
+        return JSONResponse({"error": "injected failure"}, status_code=500)
+    n = int((body.get("options") or {}).get("num_predict") or config.num_tokens)
+    if n < 0:
+        n = config.num_tokens
+    fail_at = rng.randrange(1, n) if n > 1 and rng.random() < config.midstream_error_rate else None
+    delay = 1.0 / config.tokens_per_sec
+
+    async def gen():
+        await asyncio.sleep(config.ttft)
+        for i in range(n):
+            if i == fail_at:
+                yield (json.dumps({"error": "injected mid-stream failure"}) + "\n").encode()
+                return
+            if i:
+                await asyncio.sleep(delay)
+            yield chunk(model, (" " if i else "") + WORDS[i % len(WORDS)])
+        yield chunk(model, "", True, done_reason="stop", prompt_eval_count=len(json.dumps(body["messages"])) // 4,
+                    eval_count=n, total_duration=0, load_duration=0, eval_duration=0)
+
+    if body.get("stream", True):
+        return StreamingResponse(gen(), media_type="application/x-ndjson")
+    parts = [json.loads(line) async for line in gen()]
+    text = "".join(p.get("message", {}).get("content", "") for p in parts)
+    final = parts[-1]
+    final["message"] = {"role": "assistant", "content": text}
+    return final
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    # An empty prompt is how clients ask Ollama to load a model
+    body = await request.json()
+    return {"model": body.get("model", "fake"), "created_at": now(), "response": "", "done": True}
+
+
+@app.post("/api/embed")
+async def embed(request: Request):
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    vectors = []
+    for text in inputs:
+        # Deterministic pseudo-embedding from a hash of the normalised text
+        digest = hashlib.sha256(text.strip().lower().encode()).digest()
+        vectors.append([b / 255 - 0.5 for b in digest])
+    return {"model": body.get("model", "fake"), "embeddings": vectors}
+
+
+@app.get("/api/tags")
+def tags():
+    return {"models": [{"name": "gemma3:270m", "model": "gemma3:270m"}]}
+
+
+@app.get("/api/version")
+def version():
+    return {"version": "0.0.0-fake"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--ttft", type=float, default=config.ttft)
+    parser.add_argument("--tokens-per-sec", type=float, default=config.tokens_per_sec)
+    parser.add_argument("--num-tokens", type=int, default=config.num_tokens)
+    parser.add_argument("--error-rate", type=float, default=config.error_rate)
+    parser.add_argument("--midstream-error-rate", type=float, default=config.midstream_error_rate)
+    parser.add_argument("--seed", type=int, default=config.seed)
+    args = parser.parse_args()
+    config.ttft = args.ttft
+    config.tokens_per_sec = args.tokens_per_sec
+    config.num_tokens = args.num_tokens
+    config.error_rate = args.error_rate
+    config.midstream_error_rate = args.midstream_error_rate
+    rng.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
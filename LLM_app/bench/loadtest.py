@@ -0,0 +1,218 @@
+"""Benchmark driver for LLM_app.
+
+Runs N concurrent clients against /chat and/or /chat/stream and reports
+p50/p95/p99 latency, time to first token and tokens per second. Use it
+with fake_ollama.py for runs that are comparable across commits (from bench/):
+
+    python fake_ollama.py --ttft 0.1 --tokens-per-sec 100 &
+    uvicorn llm_api.main:app --app-dir ../src --port 8000 &
+    python loadtest.py --concurrency 50 --requests 500 --json results.json
+
+Tokens are counted the same way on both paths, as whitespace-separated
+words of the response text (one word per token with fake_ollama.py), so
+/chat and /chat/stream throughput are directly comparable.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "mean": statistics.fmean(values) if values else None,
+    }
+
+
+class Result:
+    def __init__(self):
+        self.latency: List[float] = []
+        self.ttft: List[float] = []
+        self.tps: List[float] = []
+        self.tokens = 0
+        self.errors: Dict[str, int] = {}
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+
+def count_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def payload(i: int, args) -> dict:
+    prompt = f"Benchmark prompt #{i}" if args.unique_prompts else "Benchmark prompt"
+    body = {"messages": [{"role": "user", "content": prompt}], "cache": args.cache}
+    if args.frames:
+        body["stream"] = {"mode": "frame"}
+    return body
+
+
+async def one_chat(client: httpx.AsyncClient, i: int, args, result: Result, headers: dict) -> None:
+    start = time.perf_counter()
+    r = await client.post("/chat", json=payload(i, args), headers=headers)
+    elapsed = time.perf_counter() - start
+    if r.status_code != 200:
+        result.error(str(r.status_code))
+        return
+    result.latency.append(elapsed)
+    result.ttft.append(elapsed)  # no streaming: first token arrives with the body
+    tokens = count_tokens(r.json()["content"])
+    result.tokens += tokens
+    if elapsed > 0:
+        result.tps.append(tokens / elapsed)
+
+
+async def one_stream(client: httpx.AsyncClient, i: int, args, result: Result, headers: dict) -> None:
+    start = time.perf_counter()
+    first = None
+    parts: List[str] = []  # token/frame payloads, so counting matches one_chat
+    first_tokens = 0
+    event = None
+    async with client.stream("POST", "/chat/stream", json=payload(i, args), headers=headers) as r:
+        if r.status_code != 200:
+            result.error(str(r.status_code))
+            return
+        async for line in r.aiter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                if event in ("token", None):
+                    data = line[5:]
+                    parts.append(data[1:] if data.startswith(" ") else data)
+                    if first is None:
+                        first = time.perf_counter()
+                        first_tokens = count_tokens(parts[0])
+                elif event == "error":
+                    result.error("stream_error")
+                    return
+            elif not line:
+                event = None
+    end = time.perf_counter()
+    tokens = count_tokens("".join(parts))
+    result.latency.append(end - start)
+    if first is not None:
+        result.ttft.append(first - start)
+        if end > first and tokens > first_tokens:
+            result.tps.append((tokens - first_tokens) / (end - first))
+    result.tokens += tokens
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {mode: Result() for mode in args.modes}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        async def worker(n: int):
+            # Each worker is its own client so per-client fair-share limits don't kick in
+            headers = {"X-Client-Id": f"loadtest-{n}"}
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                mode = args.modes[(i + n) % len(args.modes)]
+                fn = one_stream if mode == "stream" else one_chat
+                try:
+                    await fn(client, i, args, results[mode], headers)
+                except httpx.HTTPError as e:
+                    results[mode].error(type(e).__name__)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+        wall = time.perf_counter() - start
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "url": args.url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "cache": args.cache,
+            "unique_prompts": args.unique_prompts,
+            "frames": args.frames,
+            "wall_seconds": wall,
+        },
+    }
+    for mode, res in results.items():
+        report[mode] = {
+            "completed": len(res.latency),
+            "errors": res.errors,
+            "requests_per_sec": len(res.latency) / wall if wall else None,
+            "tokens_per_sec_total": res.tokens / wall if wall else None,
+            "latency_s": summarize(res.latency),
+            "ttft_s": summarize(res.ttft),
+            "tokens_per_sec_per_request": summarize(res.tps),
+        }
+    return report
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def print_report(report: dict) -> None:
+    meta = report["meta"]
+    print(f"commit={meta['commit']} concurrency={meta['concurrency']} requests={meta['requests']} "
+          f"wall={meta['wall_seconds']:.2f}s")
+    for mode in ("chat", "stream"):
+        if mode not in report:
+            continue
+        r = report[mode]
+        print(f"\n[{mode}] completed={r['completed']} errors={r['errors']} "
+              f"rps={r['requests_per_sec']:.1f} tok/s={r['tokens_per_sec_total']:.1f}")
+        for name in ("latency_s", "ttft_s", "tokens_per_sec_per_request"):
+            s = r[name]
+            if s["p50"] is None:
+                continue
+            print(f"  {name:<28} p50={s['p50']:.4f} p95={s['p95']:.4f} p99={s['p99']:.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--mode", choices=["chat", "stream", "both"], default="both")
+    parser.add_argument("--cache", action="store_true", help="let the server cache/coalesce responses")
+    parser.add_argument("--unique-prompts", action="store_true", help="give every request a different prompt")
+    parser.add_argument("--frames", action="store_true", help="request frame-coalesced streaming")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+    args.modes = ["chat", "stream"] if args.mode == "both" else [args.mode]
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import Counter, deque
+from typing import Dict, List
+
+from llm_api.config import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT_SECONDS,
+    ADMISSION_PER_CLIENT,
+)
+
+# Lower value is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Ticket:
+    """A held backend slot; release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController", client: str):
+        self._controller = controller
+        self.client = client
+        self.started = time.monotonic()
+        self.waited = 0.0
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self._controller._release(self)
+
+    def transfer(self) -> "Ticket":
+        """Hand the slot to a new owner; release() on this ticket becomes a no-op."""
+        ticket = Ticket(self._controller, self.client)
+        ticket.started, ticket.waited, ticket.released = self.started, self.waited, self.released
+        self.released = True
+        return ticket
+
+
+class AdmissionController:
+    """Concurrency limiter for one model with a bounded priority queue.
+
+    Waiters are ordered by priority class, then by how many slots their
+    client already holds, then by arrival, so a single noisy client cannot
+    starve the others. Requests whose expected wait exceeds the deadline are
+    rejected up front instead of timing out in the queue.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_wait: float = ADMISSION_MAX_WAIT_SECONDS,
+        per_client: int = ADMISSION_PER_CLIENT,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.per_client = per_client
+        self.active = 0
+        self._queue: List[list] = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self._per_client: Counter = Counter()
+        # Moving average of how long a slot is held; seeds the wait estimate
+        self._avg_service = 1.0
+        self._waits: deque = deque(maxlen=1024)
+        self.admitted = 0
+        self.rejected: Counter = Counter()
+
+    def _estimate_wait(self, ahead: int) -> float:
+        return (ahead + 1) * self._avg_service / self.max_concurrent
+
+    def _reject(self, reason: str, retry_after: float):
+        self.rejected[reason] += 1
+        raise AdmissionRejected(reason, retry_after)
+
+    def _admit(self, client: str, waited: float) -> Ticket:
+        self.admitted += 1
+        self._waits.append(waited)
+        ticket = Ticket(self, client)
+        ticket.waited = waited
+        return ticket
+
+    async def acquire(self, client: str, priority: str = "interactive") -> Ticket:
+        prio = PRIORITIES[priority]
+        if self._per_client[client] >= self.per_client:
+            self._reject("client_limit", self._avg_service)
+
+        if self.active < self.max_concurrent and not self._queued:
+            self.active += 1
+            self._per_client[client] += 1
+            return self._admit(client, 0.0)
+
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", self._estimate_wait(self._queued))
+        ahead = sum(1 for entry in self._queue if entry[0] <= prio and not entry[3].done())
+        estimate = self._estimate_wait(ahead)
+        if estimate > self.max_wait:
+            self._reject("deadline", estimate)
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, [prio, self._per_client[client], next(self._seq), fut])
+        self._queued += 1
+        self._per_client[client] += 1
+        start = time.monotonic()
+        try:
+            await asyncio.wait({fut}, timeout=self.max_wait)
+        except asyncio.CancelledError:
+            if fut.done():
+                # A slot was handed over just as the caller went away; pass it on
+                Ticket(self, client).release()
+            else:
+                self._abandon(fut, client)
+            raise
+        if not fut.done():
+            self._abandon(fut, client)
+            self._reject("timeout", self._avg_service)
+        return self._admit(client, time.monotonic() - start)
+
+    def _abandon(self, fut: asyncio.Future, client: str) -> None:
+        # The heap entry stays behind and is skipped by _dispatch
+        fut.cancel()
+        self._queued -= 1
+        self._per_client[client] -= 1
+        if self._per_client[client] <= 0:
+            del self._per_client[client]
+
+    def _release(self, ticket: Ticket) -> None:
+        self.active -= 1
+        self._per_client[ticket.client] -= 1
+        if self._per_client[ticket.client] <= 0:
+            del self._per_client[ticket.client]
+        held = time.monotonic() - ticket.started
+        self._avg_service = 0.9 * self._avg_service + 0.1 * held
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while self.active < self.max_concurrent and self._queue:
+            fut = heapq.heappop(self._queue)[3]
+            if fut.done():
+                continue  # abandoned waiter
+            self._queued -= 1
+            self.active += 1
+            fut.set_result(None)
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> float:
+            return waits[min(len(waits) - 1, int(p * len(waits)))] if waits else 0.0
+
+        by_priority = Counter()
+        for entry in self._queue:
+            if not entry[3].done():
+                by_priority[entry[0]] += 1
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queued": self._queued,
+            "queued_by_priority": {name: by_priority[p] for name, p in PRIORITIES.items()},
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_seconds": {
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+                "p50": pct(0.50),
+                "p95": pct(0.95),
+                "max": waits[-1] if waits else 0.0,
+            },
+            "avg_service_seconds": self._avg_service,
+        }
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def admission_for(model: str) -> AdmissionController:
+    controller = _controllers.get(model)
+    if controller is None:
+        controller = _controllers[model] = AdmissionController()
+    return controller
+
+
+def admission_stats() -> dict:
+    return {model: c.stats() for model, c in _controllers.items()}
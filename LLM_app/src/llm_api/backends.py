@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import httpx
+
+from llm_api.clients import ClientRegistry
+from llm_api.config import (
+    OLLAMA_BASE_URLS,
+    ROUTER_AFFINITY_SIZE,
+    ROUTER_AFFINITY_SLACK,
+    ROUTER_EJECT_AFTER,
+    ROUTER_HEALTH_INTERVAL_SECONDS,
+    ROUTER_POLICY,
+    ROUTER_SLOW_SECONDS,
+)
+from llm_api.schemas import ChatMessage
+
+log = logging.getLogger(__name__)
+
+
+def conversation_key(messages: List[ChatMessage]) -> Optional[str]:
+    # The opening messages stay the same for every turn of a conversation
+    head = [(m.role, m.content) for m in messages[:2]]
+    if not head:
+        return None
+    return hashlib.sha1(repr(head).encode("utf-8")).hexdigest()
+
+
+class Backend:
+    """One Ollama host with its own pooled clients and load/health state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.clients = ClientRegistry(base_url=url)
+        self.outstanding = 0
+        self.outstanding_tokens = 0
+        self.healthy = True
+        self.failures = 0  # consecutive
+        self.latency: Optional[float] = None  # health-check EWMA, seconds
+        self.served = 0
+        self.errors = 0
+
+    def load(self, policy: str) -> int:
+        return self.outstanding_tokens if policy == "token_weighted" else self.outstanding
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "outstanding_tokens": self.outstanding_tokens,
+            "consecutive_failures": self.failures,
+            "health_latency_s": self.latency,
+            "served": self.served,
+            "errors": self.errors,
+        }
+
+
+class Lease:
+    def __init__(self, router: "Router", backend: Backend, weight: int):
+        self._router = router
+        self.backend = backend
+        self.weight = weight
+        self.released = False
+
+    def release(self, ok: Optional[bool]) -> None:
+        """ok=None means the caller went away; it says nothing about backend health."""
+        if not self.released:
+            self.released = True
+            self._router._release(self, ok)
+
+
+class Router:
+    """Spreads generations across Ollama hosts.
+
+    Picks the healthy backend with the least outstanding requests (or
+    outstanding prompt tokens with the token_weighted policy). Conversations
+    stick to the backend that served them while it is within
+    ROUTER_AFFINITY_SLACK of the least-loaded one, so its KV cache stays warm.
+    Backends are ejected after ROUTER_EJECT_AFTER consecutive failures or
+    slow health checks and reinstated by the next good check.
+    """
+
+    def __init__(
+        self,
+        urls: List[str] = OLLAMA_BASE_URLS,
+        policy: str = ROUTER_POLICY,
+        affinity_size: int = ROUTER_AFFINITY_SIZE,
+        affinity_slack: int = ROUTER_AFFINITY_SLACK,
+        eject_after: int = ROUTER_EJECT_AFTER,
+        health_interval: float = ROUTER_HEALTH_INTERVAL_SECONDS,
+        slow_seconds: float = ROUTER_SLOW_SECONDS,
+    ):
+        self.backends = [Backend(url) for url in urls]
+        self.policy = policy
+        self.affinity_size = affinity_size
+        self.affinity_slack = affinity_slack
+        self.eject_after = eject_after
+        self.health_interval = health_interval
+        self.slow_seconds = slow_seconds
+        self._affinity: "OrderedDict[str, Backend]" = OrderedDict()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def pick(self, affinity: Optional[str] = None, weight: int = 1) -> Lease:
+        # With every backend ejected, still try rather than fail outright
+        candidates = [b for b in self.backends if b.healthy] or self.backends
+        # Ties go to the backend that has handled the fewest requests
+        best = min(candidates, key=lambda b: (b.load(self.policy), b.served + b.errors))
+        if affinity is not None:
+            pinned = self._affinity.get(affinity)
+            if (
+                pinned is not None
+                and pinned in candidates
+                and pinned.load(self.policy) <= best.load(self.policy) + self.affinity_slack * weight
+            ):
+                best = pinned
+            self._affinity[affinity] = best
+            self._affinity.move_to_end(affinity)
+            while len(self._affinity) > self.affinity_size:
+                self._affinity.popitem(last=False)
+        best.outstanding += 1
+        best.outstanding_tokens += weight
+        return Lease(self, best, weight)
+
+    def _release(self, lease: Lease, ok: Optional[bool]) -> None:
+        backend = lease.backend
+        backend.outstanding -= 1
+        backend.outstanding_tokens -= lease.weight
+        if ok is True:
+            backend.served += 1
+            backend.failures = 0
+        elif ok is False:
+            backend.errors += 1
+            self._failed(backend, "request failed")
+
+    def _failed(self, backend: Backend, reason: str) -> None:
+        backend.failures += 1
+        if backend.healthy and backend.failures >= self.eject_after:
+            backend.healthy = False
+            log.warning("Ejecting backend %s: %s", backend.url, reason)
+
+    async def check(self, client: httpx.AsyncClient, backend: Backend) -> None:
+        start = time.perf_counter()
+        try:
+            r = await client.get(f"{backend.url}/api/version", timeout=max(self.slow_seconds * 2, 1.0))
+            r.raise_for_status()
+        except Exception as e:
+            self._failed(backend, f"health check failed: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        backend.latency = elapsed if backend.latency is None else 0.7 * backend.latency + 0.3 * elapsed
+        if elapsed > self.slow_seconds:
+            self._failed(backend, f"health check took {elapsed:.2f}s")
+            return
+        backend.failures = 0
+        if not backend.healthy:
+            backend.healthy = True
+            log.info("Reinstating backend %s", backend.url)
+
+    async def _health_loop(self) -> None:
+        async with httpx.AsyncClient() as client:
+            while True:
+                await asyncio.gather(*(self.check(client, b) for b in self.backends))
+                await asyncio.sleep(self.health_interval)
+
+    def start_health_checks(self) -> None:
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def preload(self) -> None:
+        await asyncio.gather(*(b.clients.preload() for b in self.backends))
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for b in self.backends:
+            await b.clients.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "policy": self.policy,
+            "affinity_entries": len(self._affinity),
+            "backends": [b.stats() for b in self.backends],
+        }
+
+
+router = Router()
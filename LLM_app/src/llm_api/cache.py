@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+from llm_api.config import (
+    CACHE_DISK_PATH,
+    CACHE_MAX_BYTES,
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    MODEL_NAME,
+)
+from llm_api.schemas import ChatRequest
+
+# Fields that determine the model output; flags like `cache` are left out
+KEY_FIELDS = {"messages", "temperature", "top_p"}
+
+
+def request_key(req: ChatRequest, model: str = MODEL_NAME) -> str:
+    payload = req.model_dump(include=KEY_FIELDS)
+    payload["model"] = model
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed store so cached responses survive restarts.
+
+    Calls are blocking; ResponseCache runs them in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return row[0]
+
+    def set(self, key: str, content: str, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, expires_at) VALUES (?, ?, ?)",
+                (key, content, expires_at),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    """Exact-match cache: in-memory LRU with TTL and byte budget, optional disk tier."""
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_bytes: int = CACHE_MAX_BYTES,
+        ttl: float = CACHE_TTL_SECONDS,
+        disk_path: Optional[str] = CACHE_DISK_PATH,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk = DiskTier(disk_path) if disk_path else None
+        self._entries: "OrderedDict[str, tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _drop(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _put_memory(self, key: str, content: str, expires_at: float) -> None:
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (content, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    async def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                content, expires_at, _ = entry
+                if expires_at >= time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return content
+                self._drop(key)
+        if self.disk is not None:
+            content = await asyncio.to_thread(self.disk.get, key)
+            if content is not None:
+                with self._lock:
+                    # Promote to memory with a fresh TTL window
+                    self._put_memory(key, content, time.time() + self.ttl)
+                    self.hits += 1
+                    self.disk_hits += 1
+                return content
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def set(self, key: str, content: str) -> None:
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put_memory(key, content, expires_at)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, content, expires_at)
+
+    async def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.clear)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+response_cache = ResponseCache()
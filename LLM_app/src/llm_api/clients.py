@@ -0,0 +1,109 @@
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional
+
+import httpx
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from ollama import AsyncClient
+
+from llm_api.config import (
+    CLIENT_CACHE_SIZE,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    KEEP_ALIVE,
+    MODEL_NAME,
+    OLLAMA_BASE_URL,
+)
+
+log = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """Process-wide ChatOllama instances keyed by sampling parameters.
+
+    Every instance shares one sync and one async HTTP transport, so
+    connections to Ollama are pooled no matter which parameters a request uses.
+    """
+
+    def __init__(
+        self,
+        model: str = MODEL_NAME,
+        base_url: str = OLLAMA_BASE_URL,
+        keep_alive: str = KEEP_ALIVE,
+        max_size: int = CLIENT_CACHE_SIZE,
+    ):
+        self.model = model
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.max_size = max_size
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        )
+        self._transport = httpx.HTTPTransport(limits=limits)
+        self._async_transport = httpx.AsyncHTTPTransport(limits=limits)
+        self._clients: "OrderedDict[tuple, ChatOllama]" = OrderedDict()
+        self._embeddings: "dict[str, OllamaEmbeddings]" = {}
+        self._lock = Lock()
+
+    def _build(self, temperature: Optional[float], top_p: Optional[float]) -> ChatOllama:
+        return ChatOllama(
+            model=self.model,
+            base_url=self.base_url,
+            temperature=temperature,
+            top_p=top_p,
+            keep_alive=self.keep_alive,
+            sync_client_kwargs={"transport": self._transport},
+            async_client_kwargs={"transport": self._async_transport},
+        )
+
+    def get(self, temperature: Optional[float] = 0.2, top_p: Optional[float] = 0.9) -> ChatOllama:
+        key = (temperature, top_p)
+        with self._lock:
+            llm = self._clients.get(key)
+            if llm is not None:
+                self._clients.move_to_end(key)
+                return llm
+            llm = self._build(temperature, top_p)
+            self._clients[key] = llm
+            # Evicted instances are only dropped from the registry; requests
+            # still holding them finish normally since the transport is shared.
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+            return llm
+
+    def embeddings(self, model: str) -> OllamaEmbeddings:
+        """Embeddings client for this host, sharing the chat clients' transports."""
+        with self._lock:
+            emb = self._embeddings.get(model)
+            if emb is None:
+                emb = self._embeddings[model] = OllamaEmbeddings(
+                    model=model,
+                    base_url=self.base_url,
+                    sync_client_kwargs={"transport": self._transport},
+                    async_client_kwargs={"transport": self._async_transport},
+                )
+            return emb
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def preload(self) -> bool:
+        """Load the model into Ollama memory and warm the default client."""
+        self.get()
+        try:
+            # An empty prompt makes Ollama load the model without generating
+            async with AsyncClient(host=self.base_url) as client:
+                await client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+            return True
+        except Exception as e:
+            log.warning("Could not preload %s from %s: %s", self.model, self.base_url, e)
+            return False
+
+    async def aclose(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._embeddings.clear()
+        self._transport.close()
+        await self._async_transport.aclose()
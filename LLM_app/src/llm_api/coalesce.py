@@ -0,0 +1,113 @@
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from llm_api.admission import Ticket
+
+
+class Flight:
+    """One upstream generation whose tokens are shared by every subscriber."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+        # Admission slot held for as long as the upstream generation runs
+        self.ticket: Optional[Ticket] = None
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[str]:
+        # Replay what was already produced, then the live tail
+        i = 0
+        while True:
+            while i < len(self.tokens):
+                yield self.tokens[i]
+                i += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    """Coalesces identical in-flight generations into one upstream call.
+
+    The upstream task is cancelled only when its last subscriber leaves. The
+    leader's admission ticket moves to the flight, so the slot is held until
+    the upstream task ends rather than until the leader's response does.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    async def _run(self, flight: Flight, factory: Callable[[], AsyncIterator[str]]) -> None:
+        try:
+            async for token in factory():
+                flight.tokens.append(token)
+                flight._notify()
+        except asyncio.CancelledError:
+            # Waiters see an error (via finally); the task itself stays cancelled
+            flight.error = RuntimeError("generation cancelled")
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            if flight.ticket is not None:
+                flight.ticket.release()
+            flight.done = True
+            flight._notify()
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    async def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[str]], ticket: Optional[Ticket] = None
+    ) -> AsyncIterator[str]:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight(key)
+            if ticket is not None:
+                flight.ticket = ticket.transfer()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(flight, factory))
+            self.started += 1
+        else:
+            # Another leader got here first and already holds a slot
+            if ticket is not None:
+                ticket.release()
+            self.joined += 1
+        flight.subscribers += 1
+        try:
+            async for token in flight.follow():
+                yield token
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                # Nobody is listening any more; stop the upstream generation
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                if flight.ticket is not None:
+                    # _run's finally never runs if the task is cancelled before it starts
+                    flight.ticket.release()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
+
+
+inflight = SingleFlight()
@@ -0,0 +1,63 @@
+import os
+
+# --- Model ---
+MODEL_NAME = os.getenv("MODEL_NAME", "gemma3:270m")  # or deepseek-r1:1.5b
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+# Comma-separated list of Ollama hosts to route across; defaults to OLLAMA_BASE_URL
+OLLAMA_BASE_URLS = [u.strip().rstrip("/") for u in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if u.strip()]
+# How long Ollama keeps the model resident after the last request ("-1" = forever)
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# --- Client registry ---
+CLIENT_CACHE_SIZE = int(os.getenv("CLIENT_CACHE_SIZE", "16"))  # distinct (temperature, top_p) pairs kept
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "1") == "1"
+
+# --- Response cache ---
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH") or None  # e.g. "llm_cache.sqlite3" to persist across restarts
+
+# --- In-flight coalescing ---
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+
+# --- Admission control (per model) ---
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "4"))  # generations sent to Ollama at once
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+ADMISSION_PER_CLIENT = int(os.getenv("ADMISSION_PER_CLIENT", "8"))  # active + queued per client
+
+# --- Conversation sessions ---
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "1000"))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+SESSION_CONTEXT_TOKENS = int(os.getenv("SESSION_CONTEXT_TOKENS", "8192"))  # model context window
+SESSION_RESPONSE_RESERVE = int(os.getenv("SESSION_RESPONSE_RESERVE", "1024"))  # room left for the next turn + reply
+SESSION_TRIM_RATIO = float(os.getenv("SESSION_TRIM_RATIO", "0.6"))  # trim history down to this share of the budget
+
+# --- Multi-backend routing ---
+ROUTER_POLICY = os.getenv("ROUTER_POLICY", "least_outstanding")  # or "token_weighted"
+ROUTER_AFFINITY_SIZE = int(os.getenv("ROUTER_AFFINITY_SIZE", "10000"))  # conversations remembered
+ROUTER_AFFINITY_SLACK = int(os.getenv("ROUTER_AFFINITY_SLACK", "2"))  # extra load tolerated to keep affinity
+ROUTER_EJECT_AFTER = int(os.getenv("ROUTER_EJECT_AFTER", "3"))  # consecutive failures
+ROUTER_HEALTH_INTERVAL_SECONDS = float(os.getenv("ROUTER_HEALTH_INTERVAL_SECONDS", "5"))
+ROUTER_SLOW_SECONDS = float(os.getenv("ROUTER_SLOW_SECONDS", "2"))  # health checks slower than this count as failures
+
+# --- Batch ---
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "4"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # also capped at ADMISSION_PER_CLIENT
+BATCH_ADMISSION_RETRIES = int(os.getenv("BATCH_ADMISSION_RETRIES", "20"))  # 429s tolerated per item before it fails
+
+# --- Semantic cache (optional) ---
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "0") == "1"
+SEMANTIC_EMBED_MODEL = os.getenv("SEMANTIC_EMBED_MODEL", "nomic-embed-text")
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))  # per scope
+SEMANTIC_CACHE_MAX_SCOPES = int(os.getenv("SEMANTIC_CACHE_MAX_SCOPES", "64"))  # distinct system prompts
+
+# --- Generation guards ---
+GUARD_MAX_TOKENS = int(os.getenv("GUARD_MAX_TOKENS", "0")) or None  # server-wide cap per request; 0 = none
+GUARD_MAX_SECONDS = float(os.getenv("GUARD_MAX_SECONDS", "300")) or None
+DISCONNECT_POLL_SECONDS = float(os.getenv("DISCONNECT_POLL_SECONDS", "0.25"))
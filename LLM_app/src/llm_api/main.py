@@ -1,8 +1,16 @@
-from typing import List, Literal, Optional
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import ValidationError
 from sse_starlette.sse import EventSourceResponse
+from starlette.background import BackgroundTask
 import uvicorn
 
 # LangChain + Ollama
@@ -10,36 +18,51 @@ from langchain_ollama import ChatOllama
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.runnables import Runnable
 
+# Add the src directory to Python path
+src_path = Path(__file__).parent.parent
+sys.path.insert(0, str(src_path))
+
 # --- Config ---
-MODEL_NAME = "gemma3:270m"  # or deepseek-r1:1.5b
+from llm_api.config import (
+    ADMISSION_PER_CLIENT, BATCH_ADMISSION_RETRIES, BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY,
+    CACHE_ENABLED, COALESCE_ENABLED, GUARD_MAX_SECONDS, GUARD_MAX_TOKENS, MODEL_NAME, PRELOAD_MODEL,
+    SEMANTIC_CACHE_ENABLED,
+)
+from llm_api.backends import Backend, conversation_key, router
+from llm_api.cache import request_key, response_cache
+from llm_api.semantic_cache import Lookup, semantic_cache
+from llm_api.coalesce import inflight
+from llm_api.admission import AdmissionRejected, Ticket, admission_for, admission_stats
+from llm_api.streaming import (
+    GenerationAborted, GzipEventSourceResponse, accepts_gzip, coalesce_frames, guard, replay,
+)
+from llm_api.sessions import ChatSession, count_tokens, sessions
+from llm_api import metrics
 
-app = FastAPI(title="Local LLM (FastAPI + LangChain + Ollama)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model into Ollama before traffic arrives so the first request isn't cold
+    if PRELOAD_MODEL:
+        await router.preload()
+    router.start_health_checks()
+    yield
+    await router.aclose()
+
+app = FastAPI(title="Local LLM (FastAPI + LangChain + Ollama)", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]
 )
 
 # --- Schemas ---
-class ChatMessage(BaseModel):
-    role: Literal["system", "user", "assistant"]
-    content: str
-
-class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
-    temperature: Optional[float] = 0.2
-    top_p: Optional[float] = 0.9
-
-class ChatResponse(BaseModel):
-    content: str
+from llm_api.schemas import (
+    BatchRequest, ChatMessage, ChatRequest, ChatResponse, SessionCreate, SessionOut, SessionTurn, StreamOptions,
+)
 
 # --- Build the model/chain ---
-def build_chain(temperature: float = 0.2, top_p: float = 0.9) -> Runnable:
-    llm = ChatOllama(
-        model=MODEL_NAME,
-        temperature=temperature,
-        top_p=top_p,
-        # you can also pass: base_url="http://127.0.0.1:11434"
-    )
+def build_chain(backend: Backend, temperature: float = 0.2, top_p: float = 0.9) -> Runnable:
+    # Reuses a pooled ChatOllama per (temperature, top_p) instead of building one per request
+    llm: ChatOllama = backend.clients.get(temperature, top_p)
     return llm  # already a Runnable in LangChain
 
 def to_lc_messages(msgs: List[ChatMessage]):
@@ -53,35 +76,393 @@ def to_lc_messages(msgs: List[ChatMessage]):
             out.append(AIMessage(m.content))
     return out
 
-# --- Endpoints ---
-@app.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
+def share_key(req: ChatRequest) -> Optional[str]:
+    # None means the response must not be shared: no cache, no coalescing
+    if not req.cache:
+        return None
+    return request_key(req, MODEL_NAME)
+
+def cacheable(req: ChatRequest, key: Optional[str]) -> bool:
+    # Only deterministic requests are replayed later; sampled ones may still
+    # share a generation that is already running
+    return CACHE_ENABLED and key is not None and req.temperature == 0
+
+async def backend_stream(lc_msgs, temperature, top_p, affinity: Optional[str]) -> AsyncIterator[str]:
+    # Routed to a backend for the duration of the generation
+    weight = sum(count_tokens(m.content) for m in lc_msgs)
+    lease = router.pick(affinity, weight)
+    ok = None
     try:
-        chain = build_chain(req.temperature, req.top_p)
-        lc_msgs = to_lc_messages(req.messages)
-        result = chain.invoke(lc_msgs)
-        # result can be a BaseMessage — unify to string
-        content = getattr(result, "content", str(result))
-        return ChatResponse(content=content)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        chain = build_chain(lease.backend, temperature, top_p)
+        async for chunk in chain.astream(lc_msgs):
+            # chunk is a BaseMessageChunk; get text safely
+            text = getattr(chunk, "content", "")
+            if text:
+                yield text
+        ok = True
+    except (GeneratorExit, asyncio.CancelledError):
+        raise
+    except Exception:
+        ok = False
+        raise
+    finally:
+        lease.release(ok)
 
-@app.post("/chat/stream")
-def chat_stream(req: ChatRequest):
-    chain = build_chain(req.temperature, req.top_p)
+async def token_stream(req: ChatRequest, key: Optional[str], semantic: Optional[Lookup] = None) -> AsyncIterator[str]:
     lc_msgs = to_lc_messages(req.messages)
+    parts = []
+    async for text in backend_stream(lc_msgs, req.temperature, req.top_p, conversation_key(req.messages)):
+        parts.append(text)
+        yield text
+    # Only complete generations are cached
+    if cacheable(req, key):
+        await response_cache.set(key, "".join(parts))
+    if semantic is not None:
+        semantic_cache.store(semantic, "".join(parts))
+
+def generate(
+    req: ChatRequest, key: Optional[str], semantic: Optional[Lookup] = None, ticket: Optional[Ticket] = None
+) -> AsyncIterator[str]:
+    # Identical requests already being generated attach to that generation.
+    # A shared generation takes over the ticket and frees it when it ends;
+    # the caller's release() is then a no-op.
+    if COALESCE_ENABLED and key is not None:
+        return inflight.stream(key, lambda: token_stream(req, key, semantic), ticket)
+    return token_stream(req, key, semantic)
+
+async def cached_response(req: ChatRequest, key: Optional[str]) -> Optional[str]:
+    if not cacheable(req, key):
+        return None
+    return await response_cache.get(key)
+
+async def semantic_lookup(req: ChatRequest, key: Optional[str]) -> Optional[Lookup]:
+    # Joiners of an in-flight generation don't need an embedding; the leader stores the answer
+    if not SEMANTIC_CACHE_ENABLED or key is None or (COALESCE_ENABLED and key in inflight):
+        return None
+    return await semantic_cache.lookup(req)
+
+def client_id(request: Request) -> str:
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "anonymous")
 
-    def event_gen():
+async def admit(request: Request, priority: str, endpoint: str, key: Optional[str] = None) -> Optional[Ticket]:
+    # Joining a generation that is already running costs the backend nothing
+    if COALESCE_ENABLED and key is not None and key in inflight:
+        return None
+    try:
+        ticket = await admission_for(MODEL_NAME).acquire(client_id(request), priority)
+        metrics.QUEUE_WAIT.observe(ticket.waited, MODEL_NAME, endpoint)
+        return ticket
+    except AdmissionRejected as e:
+        metrics.REQUESTS.inc(MODEL_NAME, endpoint, "rejected")
+        raise HTTPException(
+            status_code=429,
+            detail=f"Backend busy ({e.reason})",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+def tighter(requested, cap):
+    # Per-request limits can only tighten the server-wide caps
+    if requested is None:
+        return cap
+    if cap is None:
+        return requested
+    return min(requested, cap)
+
+def guarded(tokens: AsyncIterator[str], request: Request, limits) -> AsyncIterator[str]:
+    # `limits` is the ChatRequest or SessionTurn carrying max_tokens / max_seconds
+    return guard(
+        tokens,
+        request,
+        max_tokens=tighter(limits.max_tokens, GUARD_MAX_TOKENS),
+        max_seconds=tighter(limits.max_seconds, GUARD_MAX_SECONDS),
+    )
+
+async def collect(tokens: AsyncIterator[str]) -> ChatResponse:
+    parts = []
+    try:
+        async for text in tokens:
+            parts.append(text)
+    except GenerationAborted as e:
+        return ChatResponse(content="".join(parts), truncated=e.reason)
+    return ChatResponse(content="".join(parts))
+
+def sse_response(request: Request, tokens: AsyncIterator[str], opts: StreamOptions, release) -> Response:
+    if opts.mode == "frame":
+        tokens = coalesce_frames(tokens, opts.max_latency_ms / 1000, opts.max_bytes)
+
+    async def event_gen():
         try:
-            for chunk in chain.stream(lc_msgs):
-                # chunk is a BaseMessageChunk; get text safely
-                text = getattr(chunk, "content", "")
-                if text:
+            async for text in tokens:
+                if opts.compact:
+                    yield {"data": text}
+                else:
                     yield {"event": "token", "data": text}
             yield {"event": "done", "data": "[DONE]"}
+        except GenerationAborted as e:
+            yield {"event": "truncated", "data": e.reason}
+            yield {"event": "done", "data": "[DONE]"}
         except Exception as e:
             yield {"event": "error", "data": str(e)}
-    return EventSourceResponse(event_gen())
+        finally:
+            release()
+    # The background task also releases if the stream never started
+    response_class = GzipEventSourceResponse if opts.compress and accepts_gzip(request) else EventSourceResponse
+    return response_class(event_gen(), background=BackgroundTask(release))
+
+# --- Endpoints ---
+# Both endpoints are async and use the LangChain async APIs, so an in-flight
+# generation only holds an event-loop task, not a threadpool worker.
+async def complete(req: ChatRequest, request: Request, endpoint: str) -> ChatResponse:
+    started = time.perf_counter()
+    key = share_key(req)
+    cached = await cached_response(req, key)
+    if cached is not None:
+        metrics.REQUESTS.inc(MODEL_NAME, endpoint, "cached")
+        return ChatResponse(content=cached)
+    semantic = await semantic_lookup(req, key)
+    if semantic is not None and semantic.content is not None:
+        metrics.REQUESTS.inc(MODEL_NAME, endpoint, "semantic_cached")
+        return ChatResponse(content=semantic.content)
+    ticket = await admit(request, req.priority or "batch", endpoint, key)
+    try:
+        tokens = guarded(generate(req, key, semantic, ticket), request, req)
+        return await collect(metrics.track(tokens, endpoint, started))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest, request: Request):
+    return await complete(req, request, "/chat")
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    started = time.perf_counter()
+    key = share_key(req)
+    opts = req.stream or StreamOptions()
+    cached = await cached_response(req, key)
+    semantic = await semantic_lookup(req, key) if cached is None else None
+    if cached is not None:
+        # Streaming clients get the cached answer in the same event shape
+        metrics.REQUESTS.inc(MODEL_NAME, "/chat/stream", "cached")
+        ticket, tokens = None, replay(cached)
+    elif semantic is not None and semantic.content is not None:
+        metrics.REQUESTS.inc(MODEL_NAME, "/chat/stream", "semantic_cached")
+        ticket, tokens = None, replay(semantic.content)
+    else:
+        ticket = await admit(request, req.priority or "interactive", "/chat/stream", key)
+        tokens = guarded(generate(req, key, semantic, ticket), request, req)
+        tokens = metrics.track(tokens, "/chat/stream", started)
+    release = ticket.release if ticket is not None else (lambda: None)
+    return sse_response(request, tokens, opts, release)
+
+# --- Batch ---
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+
+def validation_detail(e: ValidationError) -> list:
+    # JSON-safe error list (raw inputs may be bytes)
+    return e.errors(include_url=False, include_input=False, include_context=False)
+
+def iter_ndjson(body: bytes) -> Iterator:
+    # Yields ChatRequest items, or the validation error for lines that don't parse
+    for line in body.splitlines():
+        if line.strip():
+            try:
+                yield ChatRequest.model_validate_json(line)
+            except ValidationError as e:
+                yield e
+
+async def complete_batch_item(req: ChatRequest, request: Request) -> ChatResponse:
+    # A busy backend shouldn't fail batch items; wait as long as admission asks
+    for _ in range(BATCH_ADMISSION_RETRIES):
+        try:
+            return await complete(req, request, "/chat/batch")
+        except HTTPException as e:
+            if e.status_code != 429:
+                raise
+            await asyncio.sleep(int(e.headers["Retry-After"]))
+    return await complete(req, request, "/chat/batch")
+
+async def batch_results(items: Iterator, request: Request, concurrency: int) -> AsyncIterator[bytes]:
+    # Bounded so a slow reader stalls workers, which then hold their slots
+    results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def run(index: int, item) -> None:
+        try:
+            if isinstance(item, ValidationError):
+                line = {"index": index, "error": validation_detail(item)}
+            else:
+                result = await complete_batch_item(item, request)
+                line = {"index": index, **result.model_dump(exclude_none=True)}
+        except HTTPException as e:
+            line = {"index": index, "error": e.detail, "status": e.status_code}
+        except Exception as e:
+            line = {"index": index, "error": str(e)}
+        await results.put(line)
+        # Hold the slot until the result is queued so a slow reader applies backpressure
+        slots.release()
+
+    async def feed() -> None:
+        for index, item in enumerate(items):
+            await slots.acquire()
+            task = asyncio.create_task(run(index, item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        while tasks:
+            await asyncio.gather(*tasks)
+        await results.put(None)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (line := await results.get()) is not None:
+            yield (json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8")
+    finally:
+        feeder.cancel()
+        for task in list(tasks):
+            task.cancel()
+
+# Accepts {"items": [...], "concurrency": n} as JSON, or a JSONL file with one
+# ChatRequest per line sent as application/x-ndjson. Results stream back as
+# JSONL in completion order, each tagged with its input index.
+@app.post("/chat/batch")
+async def chat_batch(request: Request, concurrency: Optional[int] = Query(None, ge=1)):
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(NDJSON_TYPES):
+        items = iter_ndjson(body)
+    else:
+        try:
+            batch = BatchRequest.model_validate_json(body)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=validation_detail(e))
+        items = iter(batch.items)
+        concurrency = concurrency or batch.concurrency
+    # Every item is admitted under the caller's client id; going past the
+    # per-client limit would only turn the excess into 429 retries
+    concurrency = min(concurrency or BATCH_DEFAULT_CONCURRENCY, BATCH_MAX_CONCURRENCY, ADMISSION_PER_CLIENT)
+    return StreamingResponse(batch_results(items, request, concurrency), media_type="application/x-ndjson")
+
+# --- Sessions ---
+# Session endpoints are async even without I/O: SessionStore is unlocked and
+# must only be touched from the event loop thread.
+# Clients send only the new user turn; history lives server-side as ready-built
+# LangChain messages, so per-turn request size and parse cost stay constant.
+def get_session(session_id: str) -> ChatSession:
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
+def session_out(session: ChatSession) -> SessionOut:
+    roles = {"system": "system", "human": "user", "ai": "assistant"}
+    return SessionOut(
+        session_id=session.id,
+        messages=[ChatMessage(role=roles[m.type], content=m.content) for m in session.system + session.turns],
+        tokens=session.tokens,
+        dropped_turns=session.dropped_turns,
+    )
+
+async def session_tokens(session: ChatSession, content: str) -> AsyncIterator[str]:
+    # Caller holds session.lock (see start_turn)
+    parts = []
+    async for text in backend_stream(session.prompt(content), session.temperature, session.top_p, session.id):
+        parts.append(text)
+        yield text
+    # Interrupted turns are not recorded
+    session.commit(content, "".join(parts))
+
+async def start_turn(session: ChatSession, request: Request, priority: str, endpoint: str) -> Callable[[], None]:
+    """Take the session's turn lock, then an admission slot; returns an idempotent release()."""
+    # Lock first: a turn queued behind another on the same session must not
+    # hold backend capacity while it waits
+    await session.lock.acquire()
+    try:
+        ticket = await admit(request, priority, endpoint)
+    except BaseException:
+        session.lock.release()
+        raise
+    released = False
+
+    def release() -> None:
+        nonlocal released
+        if not released:
+            released = True
+            ticket.release()
+            session.lock.release()
+    return release
+
+@app.post("/sessions", response_model=SessionOut, status_code=201)
+async def create_session(payload: SessionCreate):
+    return session_out(sessions.create(payload.system, payload.temperature, payload.top_p))
+
+# Registered before /sessions/{session_id} so "stats" isn't read as an id
+@app.get("/sessions/stats")
+async def session_stats():
+    return sessions.stats()
+
+@app.get("/sessions/{session_id}", response_model=SessionOut)
+async def read_session(session_id: str):
+    return session_out(get_session(session_id))
+
+@app.delete("/sessions/{session_id}", status_code=204)
+async def delete_session(session_id: str):
+    sessions.delete(session_id)
+
+@app.post("/sessions/{session_id}/messages", response_model=ChatResponse)
+async def session_chat(session_id: str, turn: SessionTurn, request: Request):
+    started = time.perf_counter()
+    session = get_session(session_id)
+    release = await start_turn(session, request, turn.priority or "interactive", "/sessions/messages")
+    try:
+        tokens = guarded(session_tokens(session, turn.content), request, turn)
+        return await collect(metrics.track(tokens, "/sessions/messages", started))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        release()
+
+@app.post("/sessions/{session_id}/messages/stream")
+async def session_chat_stream(session_id: str, turn: SessionTurn, request: Request):
+    started = time.perf_counter()
+    session = get_session(session_id)
+    release = await start_turn(session, request, turn.priority or "interactive", "/sessions/messages/stream")
+    tokens = guarded(session_tokens(session, turn.content), request, turn)
+    tokens = metrics.track(tokens, "/sessions/messages/stream", started)
+    return sse_response(request, tokens, turn.stream or StreamOptions(), release)
+
+# Stats endpoints read state owned by the event loop, so they run on it too
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.delete("/cache", status_code=204)
+async def cache_clear():
+    await response_cache.clear()
+    semantic_cache.clear()
+
+@app.get("/cache/semantic/stats")
+async def semantic_cache_stats():
+    return semantic_cache.stats()
+
+@app.get("/inflight/stats")
+async def inflight_stats():
+    return inflight.stats()
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    return admission_stats()
+
+@app.get("/backends")
+async def backend_stats():
+    return router.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import AsyncIterator, Dict, List, Sequence, Tuple
+
+from llm_api.config import MODEL_NAME
+from llm_api.streaming import GenerationAborted
+
+# Recording is a dict lookup plus a bisect, with no locks: everything runs on
+# the event loop thread.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _fmt_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_fmt_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self.series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self.series.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, labels)} {count}")
+        return lines
+
+
+LABELS = ("model", "endpoint")
+REQUESTS = Counter("llm_requests_total", "Chat requests by outcome.", LABELS + ("status",))
+TOKENS = Counter("llm_generated_tokens_total", "Streamed chunks (~tokens) sent to clients.", LABELS)
+DISCONNECTS = Counter("llm_stream_disconnects_total", "Streams closed by the client before completion.", LABELS)
+UPSTREAM_ERRORS = Counter("llm_upstream_errors_total", "Generations that failed in the backend.", LABELS)
+ABORTED = Counter("llm_aborted_generations_total", "Generations stopped early, by reason.", LABELS + ("reason",))
+TOKENS_SAVED = Counter("llm_tokens_saved_total", "Estimated tokens not generated thanks to early aborts.", LABELS)
+DURATION = Histogram("llm_request_duration_seconds", "Total time to produce a response.", LABELS)
+TTFT = Histogram("llm_time_to_first_token_seconds", "Time from request start to first token.", LABELS)
+TPS = Histogram("llm_tokens_per_second", "Generation rate after the first token.", LABELS, RATE_BUCKETS)
+QUEUE_WAIT = Histogram("llm_queue_wait_seconds", "Time spent waiting for an admission slot.", LABELS)
+
+ALL = (REQUESTS, TOKENS, DISCONNECTS, UPSTREAM_ERRORS, ABORTED, TOKENS_SAVED, DURATION, TTFT, TPS, QUEUE_WAIT)
+
+# Moving average length of completed generations; basis for the tokens-saved estimate
+_avg_completion_tokens = 0.0
+
+
+async def track(tokens: AsyncIterator[str], endpoint: str, started: float, model: str = MODEL_NAME) -> AsyncIterator[str]:
+    """Pass tokens through while recording TTFT, rate, duration and outcome."""
+    global _avg_completion_tokens
+    first = None
+    count = 0
+    status = "ok"
+    try:
+        async for token in tokens:
+            if first is None:
+                first = time.perf_counter()
+                TTFT.observe(first - started, model, endpoint)
+            count += 1
+            yield token
+    except (GeneratorExit, asyncio.CancelledError):
+        # The response task was torn down under us: the client went away
+        status = "disconnect"
+        raise
+    except GenerationAborted as e:
+        status = e.reason
+        raise
+    except Exception:
+        status = "error"
+        UPSTREAM_ERRORS.inc(model, endpoint)
+        raise
+    finally:
+        end = time.perf_counter()
+        if status == "disconnect":
+            DISCONNECTS.inc(model, endpoint)
+        if status in ("disconnect", "max_tokens", "max_duration"):
+            ABORTED.inc(model, endpoint, status)
+            TOKENS_SAVED.inc(model, endpoint, amount=max(0.0, _avg_completion_tokens - count))
+        DURATION.observe(end - started, model, endpoint)
+        REQUESTS.inc(model, endpoint, status)
+        TOKENS.inc(model, endpoint, amount=count)
+        if first is not None and count > 1 and end > first:
+            TPS.observe((count - 1) / (end - first), model, endpoint)
+        if status == "ok":
+            _avg_completion_tokens = count if not _avg_completion_tokens else 0.95 * _avg_completion_tokens + 0.05 * count
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in ALL:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
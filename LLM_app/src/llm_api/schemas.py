@@ -0,0 +1,49 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+class ChatMessage(BaseModel):
+    role: Literal["system", "user", "assistant"]
+    content: str
+
+class StreamOptions(BaseModel):
+    mode: Literal["token", "frame"] = "token"  # "frame" merges tokens into fewer SSE events
+    max_latency_ms: int = Field(20, ge=1, le=1000)
+    max_bytes: int = Field(1024, ge=1)
+    compact: bool = False  # send tokens as unnamed events (no "event: token" line)
+    compress: bool = False  # gzip the stream when the client accepts it
+
+class ChatRequest(BaseModel):
+    messages: List[ChatMessage]
+    temperature: Optional[float] = 0.2
+    top_p: Optional[float] = 0.9
+    cache: bool = True  # set False to bypass the response cache (used only when temperature == 0)
+    priority: Optional[Literal["interactive", "batch"]] = None  # defaults per endpoint
+    stream: Optional[StreamOptions] = None  # /chat/stream only
+    max_tokens: Optional[int] = Field(None, ge=1)  # stop generating after this many tokens
+    max_seconds: Optional[float] = Field(None, gt=0)  # stop generating after this long
+
+class ChatResponse(BaseModel):
+    content: str
+    truncated: Optional[str] = None  # why generation stopped early, if it did
+
+class BatchRequest(BaseModel):
+    items: List[ChatRequest]
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class SessionCreate(BaseModel):
+    system: Optional[str] = None
+    temperature: Optional[float] = 0.2
+    top_p: Optional[float] = 0.9
+
+class SessionTurn(BaseModel):
+    content: str
+    priority: Optional[Literal["interactive", "batch"]] = None
+    stream: Optional[StreamOptions] = None  # /messages/stream only
+    max_tokens: Optional[int] = Field(None, ge=1)
+    max_seconds: Optional[float] = Field(None, gt=0)
+
+class SessionOut(BaseModel):
+    session_id: str
+    messages: List[ChatMessage]
+    tokens: int
+    dropped_turns: int
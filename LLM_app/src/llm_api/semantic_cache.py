@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from llm_api.backends import Router, router
+from llm_api.config import (
+    MODEL_NAME,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_MAX_SCOPES,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_EMBED_MODEL,
+)
+from llm_api.schemas import ChatRequest
+
+log = logging.getLogger(__name__)
+
+
+def scope_key(req: ChatRequest, model: str = MODEL_NAME) -> Optional[str]:
+    """Cache scope for a request, or None when it isn't a standalone question.
+
+    Only requests made of system messages plus a single user turn qualify:
+    with earlier turns the right answer depends on the history. Different
+    system prompts get different scopes so personas never share answers.
+    """
+    system = [m.content for m in req.messages if m.role == "system"]
+    rest = [m for m in req.messages if m.role != "system"]
+    if len(rest) != 1 or rest[0].role != "user":
+        return None
+    blob = repr((model, system, req.temperature, req.top_p))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class Lookup:
+    """Result of a lookup; on a miss it carries what store() needs."""
+
+    def __init__(self, scope: str, vector: np.ndarray, content: Optional[str] = None, score: float = 0.0):
+        self.scope = scope
+        self.vector = vector
+        self.content = content
+        self.score = score
+
+
+class ScopeIndex:
+    """Bounded matrix of unit vectors; a lookup is one matrix-vector product.
+
+    Storage starts small and doubles up to `capacity`, so scopes that only
+    ever see a handful of questions stay cheap.
+    """
+
+    INITIAL_ROWS = 16
+
+    def __init__(self, dim: int, capacity: int):
+        self.capacity = capacity
+        rows = min(self.INITIAL_ROWS, capacity)
+        self.vectors = np.zeros((rows, dim), dtype=np.float32)
+        self.last_used = np.zeros(rows, dtype=np.float64)
+        self.contents: List[Optional[str]] = []
+        self.size = 0
+
+    def search(self, vector: np.ndarray):
+        if self.size == 0:
+            return None, 0.0
+        scores = self.vectors[: self.size] @ vector
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def _grow(self) -> None:
+        rows = min(len(self.vectors) * 2, self.capacity)
+        vectors = np.zeros((rows, self.vectors.shape[1]), dtype=np.float32)
+        vectors[: self.size] = self.vectors[: self.size]
+        last_used = np.zeros(rows, dtype=np.float64)
+        last_used[: self.size] = self.last_used[: self.size]
+        self.vectors, self.last_used = vectors, last_used
+
+    def add(self, vector: np.ndarray, content: str) -> None:
+        if self.size < self.capacity:
+            if self.size == len(self.vectors):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.contents.append(content)
+        else:
+            row = int(np.argmin(self.last_used))  # evict least recently used
+            self.contents[row] = content
+        self.vectors[row] = vector
+        self.last_used[row] = time.monotonic()
+
+
+class SemanticCache:
+    def __init__(
+        self,
+        embed_model: str = SEMANTIC_EMBED_MODEL,
+        backends: Router = router,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        max_scopes: int = SEMANTIC_CACHE_MAX_SCOPES,
+    ):
+        self.embed_model = embed_model
+        self.backends = backends
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self._scopes: "OrderedDict[str, ScopeIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.stored = 0
+        # Best similarity per lookup, for tuning the threshold
+        self._scores: deque = deque(maxlen=2048)
+        self._hit_scores: deque = deque(maxlen=2048)
+
+    async def embed(self, text: str) -> np.ndarray:
+        # Routed like generations, so embeddings follow health checks and load
+        lease = self.backends.pick()
+        ok = None
+        try:
+            raw = await lease.backend.clients.embeddings(self.embed_model).aembed_query(text)
+            ok = True
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            lease.release(ok)
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def lookup(self, req: ChatRequest) -> Optional[Lookup]:
+        scope = scope_key(req)
+        if scope is None:
+            return None
+        try:
+            vector = await self.embed(req.messages[-1].content)
+        except Exception as e:
+            # The semantic layer is best-effort; never fail the request over it
+            self.errors += 1
+            log.warning("Embedding failed, skipping semantic cache: %s", e)
+            return None
+        index = self._scopes.get(scope)
+        if index is not None:
+            self._scopes.move_to_end(scope)
+            row, score = index.search(vector)
+            self._scores.append(score)
+            if row is not None and score >= self.threshold:
+                index.last_used[row] = time.monotonic()
+                self.hits += 1
+                self._hit_scores.append(score)
+                return Lookup(scope, vector, index.contents[row], score)
+        self.misses += 1
+        return Lookup(scope, vector)
+
+    def store(self, lookup: Lookup, content: str) -> None:
+        index = self._scopes.get(lookup.scope)
+        if index is None:
+            index = self._scopes[lookup.scope] = ScopeIndex(len(lookup.vector), self.max_entries)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        elif index.vectors.shape[1] != len(lookup.vector):
+            return  # embedding model changed under us
+        index.add(lookup.vector, content)
+        self.stored += 1
+
+    def clear(self) -> None:
+        self._scopes.clear()
+
+    def stats(self) -> Dict:
+        def summary(values) -> Dict:
+            if not values:
+                return {"count": 0}
+            arr = np.fromiter(values, dtype=np.float64)
+            return {
+                "count": len(arr),
+                "mean": float(arr.mean()),
+                "p10": float(np.percentile(arr, 10)),
+                "p50": float(np.percentile(arr, 50)),
+                "p90": float(np.percentile(arr, 90)),
+            }
+
+        lookups = self.hits + self.misses
+        return {
+            "threshold": self.threshold,
+            "scopes": len(self._scopes),
+            "entries": sum(i.size for i in self._scopes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "stored": self.stored,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "best_score": summary(self._scores),
+            "hit_score": summary(self._hit_scores),
+        }
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,121 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from llm_api.config import (
+    SESSION_CONTEXT_TOKENS,
+    SESSION_IDLE_TTL_SECONDS,
+    SESSION_MAX_SESSIONS,
+    SESSION_RESPONSE_RESERVE,
+    SESSION_TRIM_RATIO,
+)
+
+
+def count_tokens(text: str) -> int:
+    # Rough estimate (~4 bytes per token); good enough to stay under the window
+    return math.ceil(len(text.encode("utf-8")) / 4) + 4
+
+
+class ChatSession:
+    """Server-side conversation history kept as ready-built LangChain messages."""
+
+    def __init__(
+        self,
+        session_id: str,
+        system: Optional[str] = None,
+        temperature: Optional[float] = 0.2,
+        top_p: Optional[float] = 0.9,
+        context_tokens: int = SESSION_CONTEXT_TOKENS,
+    ):
+        self.id = session_id
+        self.temperature = temperature
+        self.top_p = top_p
+        self.context_tokens = context_tokens
+        self.system: List[BaseMessage] = [SystemMessage(system)] if system else []
+        self.system_tokens = count_tokens(system) if system else 0
+        self.turns: List[BaseMessage] = []
+        self.turn_tokens: List[int] = []
+        self.dropped_turns = 0
+        self.lock = asyncio.Lock()  # one turn at a time per session
+        self.last_used = time.monotonic()
+
+    @property
+    def tokens(self) -> int:
+        return self.system_tokens + sum(self.turn_tokens)
+
+    def prompt(self, user_text: str) -> List[BaseMessage]:
+        return self.system + self.turns + [HumanMessage(user_text)]
+
+    def commit(self, user_text: str, reply: str) -> None:
+        self.turns += [HumanMessage(user_text), AIMessage(reply)]
+        self.turn_tokens += [count_tokens(user_text), count_tokens(reply)]
+        self._fit()
+
+    def _fit(self) -> None:
+        budget = self.context_tokens - SESSION_RESPONSE_RESERVE
+        total = self.tokens
+        if total <= budget:
+            return
+        # Trim well below the budget in one go rather than one turn per
+        # request: the prompt prefix then stays byte-identical for many
+        # turns, which keeps Ollama's KV cache reusable.
+        target = budget * SESSION_TRIM_RATIO
+        while self.turns and total > target:
+            total -= self.turn_tokens[0] + self.turn_tokens[1]
+            del self.turns[:2]
+            del self.turn_tokens[:2]
+            self.dropped_turns += 1
+
+
+class SessionStore:
+    """Bounded in-memory session store with LRU and idle-time eviction."""
+
+    def __init__(self, max_sessions: int = SESSION_MAX_SESSIONS, idle_ttl: float = SESSION_IDLE_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= cutoff and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[oldest.id]
+            self.evicted += 1
+
+    def create(self, system: Optional[str] = None, temperature: Optional[float] = 0.2, top_p: Optional[float] = 0.9) -> ChatSession:
+        self._evict()
+        session = ChatSession(uuid.uuid4().hex, system, temperature, top_p)
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.last_used < time.monotonic() - self.idle_ttl:
+            del self._sessions[session_id]
+            self.evicted += 1
+            return None
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._sessions), "evicted": self.evicted}
+
+
+sessions = SessionStore()
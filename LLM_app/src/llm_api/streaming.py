@@ -0,0 +1,155 @@
+import asyncio
+import zlib
+from typing import AsyncIterator, Optional
+
+from fastapi import Request
+from sse_starlette.sse import EventSourceResponse
+from starlette.types import Message, Receive, Scope, Send
+
+from llm_api.config import DISCONNECT_POLL_SECONDS
+
+_DONE = object()
+
+
+class GenerationAborted(Exception):
+    """Raised by guard() after it has stopped the upstream generation."""
+
+    def __init__(self, reason: str, produced: int):
+        super().__init__(reason)
+        self.reason = reason  # "disconnect", "max_tokens" or "max_duration"
+        self.produced = produced
+
+
+async def replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+async def coalesce_frames(tokens: AsyncIterator[str], max_latency: float, max_bytes: int) -> AsyncIterator[str]:
+    """Merge tokens into frames flushed after `max_latency` seconds or `max_bytes` bytes."""
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        # Read upstream in its own task so a pending flush deadline never
+        # has to cancel the upstream iterator
+        try:
+            async for token in tokens:
+                await queue.put(token)
+            await queue.put(_DONE)
+        except Exception as e:
+            await queue.put(e)
+
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(pump())
+    buf, size, deadline = [], 0, None
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buf)
+                buf, size, deadline = [], 0, None
+                continue
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                if buf:
+                    yield "".join(buf)
+                raise item
+            buf.append(item)
+            size += len(item.encode("utf-8"))
+            if deadline is None:
+                deadline = loop.time() + max_latency
+            if size >= max_bytes:
+                yield "".join(buf)
+                buf, size, deadline = [], 0, None
+        if buf:
+            yield "".join(buf)
+    finally:
+        task.cancel()
+
+
+async def _wait_disconnected(request: Request, poll: float) -> None:
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll)
+
+
+async def guard(
+    tokens: AsyncIterator[str],
+    request: Request,
+    max_tokens: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    poll: float = DISCONNECT_POLL_SECONDS,
+) -> AsyncIterator[str]:
+    """Stop the upstream generation as soon as the client leaves or a limit is hit.
+
+    Each upstream read races a disconnect watcher and the deadline; the
+    loser is cancelled and the upstream iterator closed, which aborts the
+    HTTP request to Ollama.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_seconds if max_seconds else None
+    watcher = asyncio.ensure_future(_wait_disconnected(request, poll))
+    it = tokens.__aiter__()
+    nxt = None
+    produced = 0
+    try:
+        while True:
+            nxt = asyncio.ensure_future(it.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({nxt, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if nxt not in done:
+                raise GenerationAborted("disconnect" if watcher in done else "max_duration", produced)
+            try:
+                token = nxt.result()
+            except StopAsyncIteration:
+                return
+            produced += 1
+            yield token
+            if max_tokens is not None and produced >= max_tokens:
+                raise GenerationAborted("max_tokens", produced)
+    finally:
+        watcher.cancel()
+        if nxt is not None and not nxt.done():
+            # Let the cancellation land in the upstream iterator before closing it
+            nxt.cancel()
+            await asyncio.wait({nxt})
+        await it.aclose()
+
+
+def accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+class GzipEventSourceResponse(EventSourceResponse):
+    """EventSourceResponse with a gzip-encoded body.
+
+    Compression wraps `send`, so keep-alive pings and disconnect handling
+    work as usual. Each message is sync-flushed so frames are not held back
+    by the compressor.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.headers["Content-Encoding"] = "gzip"
+        self.headers["Vary"] = "Accept-Encoding"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        comp = zlib.compressobj(6, zlib.DEFLATED, 31)
+        # Events and pings are sent from different tasks; keep the
+        # compressed stream in the order it was produced
+        lock = asyncio.Lock()
+
+        async def gzip_send(message: Message) -> None:
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            async with lock:
+                body = comp.compress(message.get("body", b""))
+                if message.get("more_body", False):
+                    body += comp.flush(zlib.Z_SYNC_FLUSH)
+                else:
+                    body += comp.flush()
+                await send({**message, "body": body})
+
+        await super().__call__(scope, receive, gzip_send)
@@ -0,0 +1,34 @@
+"""Add (user_id, completed, id) index on tasks for keyset pagination"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "b7e2c41f9a03"
+down_revision: Union[str, None] = "XXXXXXXX_align_users_tasks"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_tasks_user_completed_id"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "tasks" in insp.get_table_names():
+        idx_names = {idx["name"] for idx in insp.get_indexes("tasks")}
+        if INDEX_NAME not in idx_names:
+            op.create_index(INDEX_NAME, "tasks", ["user_id", "completed", "id"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "tasks" in insp.get_table_names():
+        idx_names = {idx["name"] for idx in insp.get_indexes("tasks")}
+        if INDEX_NAME in idx_names:
+            # ix_tasks_user_id still backs the FK on MySQL, so this is safe to drop
+            op.drop_index(INDEX_NAME, table_name="tasks")
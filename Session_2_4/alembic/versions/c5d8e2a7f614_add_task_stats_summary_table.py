@@ -0,0 +1,41 @@
+"""Add task_stats summary table (per-user task counters) and backfill it"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "c5d8e2a7f614"
+down_revision: Union[str, None] = "b7e2c41f9a03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "task_stats" not in insp.get_table_names():
+        op.create_table(
+            "task_stats",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("total", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.Column("completed", sa.Integer(), nullable=False, server_default=sa.text("0")),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], name="fk_task_stats_user"),
+        )
+
+    # Backfill from existing tasks (same as `python -m app.rebuild_stats`)
+    op.execute("DELETE FROM task_stats")
+    op.execute(
+        "INSERT INTO task_stats (user_id, total, completed) "
+        "SELECT user_id, COUNT(*), SUM(CASE WHEN completed THEN 1 ELSE 0 END) "
+        "FROM tasks GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "task_stats" in insp.get_table_names():
+        op.drop_table("task_stats")
@@ -0,0 +1,60 @@
+"""Add updated_at/version change markers to users, tasks and task_stats"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "d9a4b6c3e851"
+down_revision: Union[str, None] = "c5d8e2a7f614"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _updated_at() -> sa.Column:
+    return sa.Column(
+        "updated_at",
+        sa.DateTime(timezone=True),
+        server_default=sa.text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+
+
+def _version() -> sa.Column:
+    return sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = insp.get_table_names()
+
+    if "users" in tables:
+        user_cols = {c["name"] for c in insp.get_columns("users")}
+        if "updated_at" not in user_cols:
+            op.add_column("users", _updated_at())
+        if "version" not in user_cols:
+            op.add_column("users", _version())
+
+    if "tasks" in tables:
+        task_cols = {c["name"] for c in insp.get_columns("tasks")}
+        if "updated_at" not in task_cols:
+            op.add_column("tasks", _updated_at())
+
+    if "task_stats" in tables:
+        stats_cols = {c["name"] for c in insp.get_columns("task_stats")}
+        if "version" not in stats_cols:
+            op.add_column("task_stats", _version())
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = insp.get_table_names()
+
+    for table, cols in (("task_stats", ["version"]), ("tasks", ["updated_at"]), ("users", ["version", "updated_at"])):
+        if table in tables:
+            existing = {c["name"] for c in insp.get_columns(table)}
+            for col in cols:
+                if col in existing:
+                    op.drop_column(table, col)
@@ -0,0 +1,47 @@
+"""Soft-delete tombstones on tasks; index updated_at for `since` delta sync"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f7a9c1b468"
+down_revision: Union[str, None] = "d9a4b6c3e851"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = insp.get_table_names()
+
+    if "tasks" in tables:
+        task_cols = {c["name"] for c in insp.get_columns("tasks")}
+        if "deleted_at" not in task_cols:
+            op.add_column("tasks", sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True))
+
+    for table in ("tasks", "users"):
+        if table in tables:
+            idx_names = {idx["name"] for idx in insp.get_indexes(table)}
+            if f"ix_{table}_updated_at" not in idx_names:
+                op.create_index(f"ix_{table}_updated_at", table, ["updated_at"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    tables = insp.get_table_names()
+
+    for table in ("tasks", "users"):
+        if table in tables:
+            idx_names = {idx["name"] for idx in insp.get_indexes(table)}
+            if f"ix_{table}_updated_at" in idx_names:
+                op.drop_index(f"ix_{table}_updated_at", table_name=table)
+
+    if "tasks" in tables:
+        task_cols = {c["name"] for c in insp.get_columns("tasks")}
+        if "deleted_at" in task_cols:
+            # Tombstoned rows would reappear as live tasks; purge them first
+            op.execute("DELETE FROM tasks WHERE deleted_at IS NOT NULL")
+            op.drop_column("tasks", "deleted_at")
@@ -2,6 +2,11 @@
 CREATE DATABASE IF NOT EXISTS appdb_test
   CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci;
 
+-- Second test database standing in for a read replica (TEST_REPLICA_DATABASE_URL)
+CREATE DATABASE IF NOT EXISTS appdb_test_replica
+  CHARACTER SET utf8mb4 COLLATE utf8mb4_0900_ai_ci;
+
 -- Grant privileges to appuser (assumes appuser is created by env vars)
 GRANT ALL PRIVILEGES ON appdb_test.* TO 'appuser'@'%';
+GRANT ALL PRIVILEGES ON appdb_test_replica.* TO 'appuser'@'%';
 FLUSH PRIVILEGES;
\ No newline at end of file
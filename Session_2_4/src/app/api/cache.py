@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.core.cache import cache
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+@router.get("/stats")
+async def cache_stats():
+    return cache.stats()
+
+@router.delete("", status_code=204)
+async def clear_cache():
+    await cache.clear()
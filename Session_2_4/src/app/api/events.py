@@ -0,0 +1,49 @@
+import json
+
+from fastapi import APIRouter, Query, Request
+from sse_starlette.sse import EventSourceResponse
+
+from app.core.config import settings
+from app.core.events import broker
+
+router = APIRouter(tags=["events"])
+
+def _sse(event: dict) -> dict:
+    return {"id": event["id"], "event": event["type"], "data": json.dumps(event["data"])}
+
+@router.get("/events")
+async def events(
+    request: Request,
+    user_id: int | None = None,
+    last_event_id: str | None = Query(None, description="Fallback for clients that can't send Last-Event-ID"),
+    follow: bool = True,
+):
+    """Server-sent change feed for users and tasks.
+
+    Resumes after Last-Event-ID when it is still in history; otherwise sends
+    a `reset` event (refetch, then continue from its id). `follow=false`
+    returns what is pending and closes, for polling clients.
+    """
+    last = request.headers.get("last-event-id") or last_event_id
+
+    async def stream():
+        sub = await broker.subscribe(last)
+        try:
+            if sub.reset or last is None:
+                # Hand the client a resume point before any events
+                yield {"id": sub.head, "event": "reset" if sub.reset else "ready", "data": "{}", "retry": 3000}
+            while True:
+                event = await sub.get(settings.events_heartbeat if follow else 0)
+                if event is None:
+                    if not follow:
+                        return
+                    continue
+                if event["type"] == "reset":
+                    yield _sse(event)
+                    return  # dropped for lagging; the client reconnects from here
+                if user_id is None or event["user_id"] == user_id:
+                    yield _sse(event)
+        finally:
+            await sub.close()
+
+    return EventSourceResponse(stream(), ping=int(settings.events_heartbeat))
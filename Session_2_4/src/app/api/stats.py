@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.db import get_db
+from app.models.task_stats import TaskStats
+from app.schemas.stats import TaskStatsOut
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+def _counts(total: int, completed: int) -> dict:
+    return {"total": total, "completed": completed, "completion_rate": round(completed / total, 4) if total else 0.0}
+
+@router.get("/tasks", response_model=TaskStatsOut)
+async def task_stats(user_id: int | None = None, db: AsyncSession = Depends(get_db)):
+    # Reads the summary table only: O(users), never scans tasks
+    q = select(TaskStats).where(TaskStats.total > 0).order_by(TaskStats.user_id)
+    if user_id is not None:
+        q = q.filter(TaskStats.user_id == user_id)
+    rows = (await db.scalars(q)).all()
+    total, completed = (await db.execute(
+        select(func.coalesce(func.sum(TaskStats.total), 0), func.coalesce(func.sum(TaskStats.completed), 0))
+    )).one()
+    return {
+        "global": _counts(int(total), int(completed)),
+        "users": [{"user_id": r.user_id, **_counts(r.total, r.completed)} for r in rows],
+    }
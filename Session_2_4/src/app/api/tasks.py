@@ -1,48 +1,248 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.core.db import get_db
+from collections import Counter
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import bulk, export, stats
+from app.core.cache import cache, invalidate_tasks, task_scopes
+from app.core.config import settings
+from app.core.delta import delta_page
+from app.core.db import get_db, get_sessionmaker, on_replica
+from app.core.etag import make_etag, not_modified
+from app.core.events import broker
+from app.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, paginate
 from app.models.task import Task
 from app.models.user import User
-from app.schemas.task import TaskCreate, TaskOut, TaskUpdate
+from app.schemas.bulk import BulkAffected, BulkResult
+from app.schemas.page import DeltaPage, Page
+from app.schemas.task import TaskBulkUpdate, TaskChange, TaskCreate, TaskIds, TaskOut, TaskUpdate
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+def _event_data(task: Task) -> dict:
+    return TaskOut.model_validate(task).model_dump(mode="json")
+
 @router.post("", response_model=TaskOut, status_code=201)
-def create_task(payload: TaskCreate, db: Session = Depends(get_db)):
-    if not db.get(User, payload.user_id):
-        raise HTTPException(404, "User does not exist")
+async def create_task(payload: TaskCreate, db: AsyncSession = Depends(get_db)):
+    # No existence lookup: the FKs on tasks.user_id/task_stats.user_id reject
+    # unknown users, and TaskOut needs nothing a refresh would add
     task = Task(user_id=payload.user_id, title=payload.title, completed=False)
-    db.add(task); db.commit(); db.refresh(task)
+    db.add(task)
+    try:
+        # Flush first: every write path locks tasks rows before task_stats,
+        # and the same order here keeps MySQL from deadlocking
+        await db.flush()
+        await stats.apply_delta(db, task.user_id, 1, 0)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(404, "User does not exist")
+    await invalidate_tasks([task.user_id])
+    await broker.publish("task.created", task.user_id, _event_data(task))
     return task
 
-@router.get("", response_model=list[TaskOut])
-def list_tasks(
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_tasks(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create many tasks from a JSON array or a streamed NDJSON body."""
+    results = []
+    async for chunk in bulk.iter_chunks(request, TaskCreate, settings.bulk_chunk_size, results):
+        # One set-based lookup per chunk instead of db.get per item
+        user_ids = {item.user_id for _, item in chunk}
+        known = set(await db.scalars(select(User.id).where(User.id.in_(user_ids))))
+        ok = []
+        for i, item in chunk:
+            if item.user_id in known:
+                ok.append((i, item))
+            else:
+                results.append(bulk.error(i, "User does not exist"))
+        rows = [{"user_id": item.user_id, "title": item.title, "completed": False} for _, item in ok]
+        try:
+            ids = await bulk.insert_rows(db, Task, rows)
+            per_user = Counter(row["user_id"] for row in rows)
+            await stats.apply_deltas(db, {uid: (n, 0) for uid, n in per_user.items()})
+            await db.commit()
+        except IntegrityError:
+            # A user was deleted between the lookup and the insert
+            await db.rollback()
+            results.extend(bulk.error(i, "Conflict, retry") for i, _ in ok)
+            continue
+        results.extend(bulk.created(i, id_) for (i, _), id_ in zip(ok, ids))
+        if ids:
+            await invalidate_tasks(item.user_id for _, item in ok)
+            await broker.publish_many("task.created", [
+                (item.user_id, {"id": id_, "user_id": item.user_id, "title": item.title, "completed": False})
+                for (_, item), id_ in zip(ok, ids)
+            ])
+    return bulk.summarize(results)
+
+@router.get("", response_model=Page[TaskOut] | DeltaPage[TaskChange])
+async def list_tasks(
+    request: Request,
+    response: Response,
+    user_id: int | None = None,
+    completed: bool | None = Query(None),
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: str | None = None,
+    since: datetime | None = Query(None, description="Delta sync: changes (incl. tombstones) since this watermark"),
+    db: AsyncSession = Depends(get_db),
+):
+    if since is not None and completed is not None:
+        # A task that flips out of the filter would never reach the client
+        # again; delta clients filter on completed locally
+        raise HTTPException(400, "completed cannot be combined with since")
+    scopes = task_scopes(user_id)
+    # Replica-sourced values may predate the last write; never cache them
+    store = not on_replica(db)
+    version = await cache.get_or_load(
+        await cache.scoped_key("tasks:version", scopes, user_id), lambda: stats.tasks_version(db, user_id), store=store
+    )
+    etag = make_etag("tasks", user_id, version, completed, limit, cursor, since)
+    if hit := not_modified(request, etag):
+        return hit
+    response.headers["ETag"] = etag
+
+    q = select(Task)
+    if user_id is not None:
+        q = q.filter(Task.user_id == user_id)
+    if completed is not None:
+        q = q.filter(Task.completed == completed)
+    if since is not None:
+        # Not cached: every client's watermark differs
+        return await delta_page(db, q, Task, since, limit, cursor, TaskChange)
+    q = q.filter(Task.deleted_at.is_(None))
+    async def load():
+        # Served by ix_tasks_user_completed_id for the filtered variants
+        page = await paginate(db, q, Task.id, limit, cursor)
+        return Page[TaskOut].model_validate(page).model_dump(mode="json")
+    key = await cache.scoped_key("tasks:list", scopes, user_id, completed, limit, cursor)
+    return await cache.get_or_load(key, load, store=store)
+
+@router.get("/export")
+async def export_tasks(
+    format: Literal["ndjson", "csv", "arrow"] = "ndjson",
     user_id: int | None = None,
     completed: bool | None = Query(None),
-    db: Session = Depends(get_db),
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    sessionmaker=Depends(get_sessionmaker),
 ):
-    q = db.query(Task)
+    """Stream every matching task; created_from is inclusive, created_to exclusive."""
+    q = select(Task.id, Task.user_id, Task.title, Task.completed, Task.created_at).filter(Task.deleted_at.is_(None))
     if user_id is not None:
         q = q.filter(Task.user_id == user_id)
     if completed is not None:
         q = q.filter(Task.completed == completed)
-    return q.order_by(Task.id.desc()).all()
+    if created_from is not None:
+        q = q.filter(Task.created_at >= created_from)
+    if created_to is not None:
+        q = q.filter(Task.created_at < created_to)
+    q = q.order_by(Task.id).execution_options(yield_per=settings.export_batch_size)
+
+    async def batches():
+        # Own session: the request-scoped one is closed before the body streams
+        async with sessionmaker() as db:
+            result = await db.stream(q)
+            async for batch in result.partitions():
+                yield batch
+
+    return StreamingResponse(
+        export.ENCODERS[format](batches()),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+def _selection(ids: list[int] | None, user_id: int | None, completed: bool | None) -> list:
+    if ids is None and user_id is None and completed is None:
+        # Refuse to touch the whole table by accident
+        raise HTTPException(400, "Provide ids, user_id or completed")
+    conds = [Task.deleted_at.is_(None)]
+    if ids is not None:
+        conds.append(Task.id.in_(ids))
+    if user_id is not None:
+        conds.append(Task.user_id == user_id)
+    if completed is not None:
+        conds.append(Task.completed == completed)
+    return conds
+
+@router.patch("", response_model=BulkAffected)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    user_id: int | None = None,
+    completed: bool | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Apply title/completed to every task matching ids and/or the filters."""
+    conds = _selection(payload.ids, user_id, completed)
+    values = payload.model_dump(include={"title", "completed"}, exclude_none=True)
+    if not values:
+        raise HTTPException(400, "Nothing to update")
+    # Every matched user's version moves; only rows that flip move `completed`
+    matched = await stats.counts_by_user(db, conds)
+    new = values.get("completed")
+    await stats.apply_deltas(db, {
+        uid: (0, 0 if new is None else (n - done if new else -done)) for uid, (n, done) in matched.items()
+    })
+    res = await db.execute(
+        update(Task).where(*conds).values(**values).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await invalidate_tasks(matched)
+    # Ids aren't known without another query; subscribers refetch per user
+    await broker.publish_many("task.bulk_updated", [
+        (uid, {"user_id": uid, "count": n, "changes": values}) for uid, (n, _) in matched.items()
+    ])
+    return {"affected": res.rowcount}
+
+@router.delete("", response_model=BulkAffected)
+async def bulk_delete_tasks(
+    payload: TaskIds | None = None,
+    user_id: int | None = None,
+    completed: bool | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Delete every task matching ids and/or the filters."""
+    conds = _selection(payload.ids if payload else None, user_id, completed)
+    removed = await stats.counts_by_user(db, conds)
+    await stats.apply_deltas(db, {uid: (-n, -done) for uid, (n, done) in removed.items()})
+    # Soft delete: tombstones let `since` clients see the removal
+    res = await db.execute(
+        update(Task).where(*conds).values(deleted_at=func.now()).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    await invalidate_tasks(removed)
+    await broker.publish_many("task.bulk_deleted", [
+        (uid, {"user_id": uid, "count": n}) for uid, (n, _) in removed.items()
+    ])
+    return {"affected": res.rowcount}
 
 @router.patch("/{task_id}", response_model=TaskOut)
-def update_task(task_id: int, payload: TaskUpdate, db: Session = Depends(get_db)):
-    task = db.get(Task, task_id)
-    if not task:
+async def update_task(task_id: int, payload: TaskUpdate, db: AsyncSession = Depends(get_db)):
+    # Row lock so concurrent toggles can't double-count in task_stats
+    task = await db.get(Task, task_id, with_for_update=True)
+    if not task or task.deleted_at is not None:
         raise HTTPException(404, "Not found")
     if payload.title is not None:
         task.title = payload.title
+    flip = payload.completed is not None and payload.completed != task.completed
+    await stats.apply_delta(db, task.user_id, 0, (1 if payload.completed else -1) if flip else 0)
     if payload.completed is not None:
         task.completed = payload.completed
-    db.commit(); db.refresh(task)
+    # The locked row is current, so no refresh SELECT after the UPDATE
+    await db.commit()
+    await invalidate_tasks([task.user_id])
+    await broker.publish("task.updated", task.user_id, _event_data(task))
     return task
 
 @router.delete("/{task_id}", status_code=204)
-def delete_task(task_id: int, db: Session = Depends(get_db)):
-    task = db.get(Task, task_id)
-    if not task:
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_db)):
+    task = await db.get(Task, task_id, with_for_update=True)
+    if not task or task.deleted_at is not None:
         return
-    db.delete(task); db.commit()
+    await stats.apply_delta(db, task.user_id, -1, -int(task.completed))
+    task.deleted_at = func.now(); await db.commit()
+    await invalidate_tasks([task.user_id])
+    await broker.publish("task.deleted", task.user_id, {"id": task.id, "user_id": task.user_id})
@@ -1,26 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.core.db import get_db
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import bulk
+from app.core.cache import cache, user_key
+from app.core.config import settings
+from app.core.delta import delta_page
+from app.core.db import get_db, on_replica
+from app.core.etag import make_etag, not_modified
+from app.core.events import broker
+from app.core.pagination import DEFAULT_LIMIT, MAX_LIMIT, paginate
 from app.models.user import User
-from app.schemas.user import UserCreate, UserOut
+from app.schemas.bulk import BulkResult
+from app.schemas.page import DeltaPage, Page
+from app.schemas.user import UserChange, UserCreate, UserOut
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+async def cached_user(db: AsyncSession, user_id: int) -> dict | None:
+    """User as a UserOut dict, or None; absence is cached too (ids are never reused)."""
+    async def load():
+        user = await db.get(User, user_id)
+        if user:
+            return UserOut.model_validate(user).model_dump(mode="json")
+        return False
+    # Replica reads (hits or misses) are served but not cached
+    return await cache.get_or_load(user_key(user_id), load, store=not on_replica(db)) or None
+
+async def users_version(db: AsyncSession) -> str:
+    # Inserts change the count, updates the version sum; cached until a user write
+    async def load():
+        n, v = (await db.execute(select(func.count(), func.coalesce(func.sum(User.version), 0)))).one()
+        return f"{n}.{v}"
+    key = await cache.scoped_key("users:version", ["users"])
+    return await cache.get_or_load(key, load, store=not on_replica(db))
+
 @router.post("", response_model=UserOut, status_code=201)
-def create_user(payload: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter_by(email=payload.email).first():
-        raise HTTPException(status_code=409, detail="Email already exists")
+async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    # A single INSERT; the unique index on users.email reports duplicates.
+    # No refresh: UserOut fields are all known once the id is assigned.
     user = User(email=payload.email, full_name=payload.full_name)
-    db.add(user); db.commit(); db.refresh(user)
+    db.add(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Email already exists")
+    await cache.invalidate(user_key(user.id)); await cache.bump("users")
+    await broker.publish("user.created", user.id, UserOut.model_validate(user).model_dump(mode="json"))
     return user
 
-@router.get("", response_model=list[UserOut])
-def get_users(db: Session = Depends(get_db)):
-    return db.query(User).order_by(User.id.desc()).all()
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_users(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create many users from a JSON array or a streamed NDJSON body."""
+    results = []
+    async for chunk in bulk.iter_chunks(request, UserCreate, settings.bulk_chunk_size, results):
+        emails = {item.email for _, item in chunk}
+        taken = {e.lower() for e in await db.scalars(select(User.email).where(User.email.in_(emails)))}
+        ok = []
+        for i, item in chunk:
+            key = item.email.lower()
+            if key in taken:
+                results.append(bulk.error(i, "Email already exists"))
+            else:
+                taken.add(key)  # later duplicates within the same request conflict too
+                ok.append((i, item))
+        rows = [{"email": item.email, "full_name": item.full_name} for _, item in ok]
+        try:
+            ids = await bulk.insert_rows(db, User, rows)
+            await db.commit()
+        except IntegrityError:
+            # A concurrent writer took one of these emails
+            await db.rollback()
+            results.extend(bulk.error(i, "Conflict, retry") for i, _ in ok)
+            continue
+        results.extend(bulk.created(i, id_) for (i, _), id_ in zip(ok, ids))
+        if ids:
+            await cache.invalidate(*map(user_key, ids)); await cache.bump("users")
+            await broker.publish_many("user.created", [
+                (id_, {"id": id_, "email": item.email, "full_name": item.full_name, "version": 1})
+                for (_, item), id_ in zip(ok, ids)
+            ])
+    return bulk.summarize(results)
+
+@router.get("", response_model=Page[UserOut] | DeltaPage[UserChange])
+async def get_users(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: str | None = None,
+    since: datetime | None = Query(None, description="Delta sync: users created or updated since this watermark"),
+    db: AsyncSession = Depends(get_db),
+):
+    etag = make_etag("users", await users_version(db), limit, cursor, since)
+    if hit := not_modified(request, etag):
+        return hit
+    response.headers["ETag"] = etag
+    if since is not None:
+        return await delta_page(db, select(User), User, since, limit, cursor, UserChange)
+    async def load():
+        page = await paginate(db, select(User), User.id, limit, cursor)
+        return Page[UserOut].model_validate(page).model_dump(mode="json")
+    key = await cache.scoped_key("users:list", ["users"], limit, cursor)
+    return await cache.get_or_load(key, load, store=not on_replica(db))
 
 @router.get("/{user_id}", response_model=UserOut)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.get(User, user_id)
+async def get_user(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    user = await cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Not found")
+    etag = make_etag("user", user_id, user["version"])
+    if hit := not_modified(request, etag):
+        return hit
+    response.headers["ETag"] = etag
     return user
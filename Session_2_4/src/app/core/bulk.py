@@ -0,0 +1,93 @@
+import json
+from typing import AsyncIterator, TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, text
+
+from app.schemas.bulk import BulkItemResult, BulkResult
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+M = TypeVar("M", bound=BaseModel)
+
+# Gap between consecutive MySQL auto-increment ids (auto_increment_increment,
+# e.g. >1 in multi-primary setups); read once at startup by detect_autoinc_step
+autoinc_step = 1
+
+async def detect_autoinc_step(conn) -> None:
+    global autoinc_step
+    if conn.dialect.name == "mysql":
+        autoinc_step = int(await conn.scalar(text("SELECT @@auto_increment_increment")))
+
+async def _iter_raw(request: Request) -> AsyncIterator[tuple[int, object]]:
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype in NDJSON_TYPES:
+        # Streamed: parse line by line without buffering the whole body
+        buf, i = b"", 0
+        async for chunk in request.stream():
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield i, line
+                    i += 1
+        if buf.strip():
+            yield i, buf
+        return
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+    if not isinstance(body, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON array of items")
+    for i, item in enumerate(body):
+        yield i, item
+
+async def iter_chunks(
+    request: Request, schema: type[M], size: int, results: list[BulkItemResult]
+) -> AsyncIterator[list[tuple[int, M]]]:
+    """Yield validated (index, item) chunks; invalid items go straight to results."""
+    chunk: list[tuple[int, M]] = []
+    async for i, raw in _iter_raw(request):
+        try:
+            if isinstance(raw, bytes):
+                item = schema.model_validate_json(raw)
+            else:
+                item = schema.model_validate(raw)
+        except ValidationError as e:
+            results.append(error(i, "; ".join(err["msg"] for err in e.errors())))
+            continue
+        chunk.append((i, item))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+async def insert_rows(db, model, rows: list[dict]) -> list[int]:
+    """Multi-row INSERT of ``rows``, returning the new ids in input order."""
+    if not rows:
+        return []
+    # One multi-row INSERT; auto-increment ids are assigned ascending in
+    # VALUES order, so sorted ids line up with the input rows
+    stmt = insert(model).values(rows)
+    if db.bind.dialect.insert_returning:
+        return sorted((await db.scalars(stmt.returning(model.id))).all())
+    # MySQL has no RETURNING. LAST_INSERT_ID() is the first new id and the
+    # rest follow it autoinc_step apart: a multi-row INSERT ... VALUES is a
+    # "simple insert" (row count known up front), which InnoDB gives one
+    # gapless block under every innodb_autoinc_lock_mode, interleaved included
+    res = await db.execute(stmt)
+    return list(range(res.lastrowid, res.lastrowid + len(rows) * autoinc_step, autoinc_step))
+
+def created(index: int, id_: int) -> BulkItemResult:
+    return BulkItemResult(index=index, status="created", id=id_)
+
+def error(index: int, detail: str) -> BulkItemResult:
+    return BulkItemResult(index=index, status="error", detail=detail)
+
+def summarize(results: list[BulkItemResult]) -> BulkResult:
+    results.sort(key=lambda r: r.index)
+    n = sum(r.status == "created" for r in results)
+    return BulkResult(created=n, failed=len(results) - n, results=results)
@@ -0,0 +1,183 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+from app.core.config import settings
+
+# Values are JSON-able (dicts from model_dump, bools) so any backend can hold
+# them. `None` from a backend means "miss"; cache False to remember absence.
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Any: ...
+    async def set(self, key: str, value: Any, ttl: float) -> None: ...
+    async def delete(self, *keys: str) -> None: ...
+    async def incr(self, key: str) -> int: ...
+    async def counter(self, key: str) -> int: ...
+    async def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL. Also the local stand-in for a shared backend in tests."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        # Generation counters live outside the LRU: evicting one would reset
+        # it and could resurrect entries keyed on an old generation
+        self._counters: dict[str, int] = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self._counters.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "max_entries": self.max_entries, "evictions": self.evictions}
+
+
+class RedisBackend:
+    """Shared cache across workers. Requires the optional `redis` package."""
+
+    def __init__(self, url: str, prefix: str = "tasktracker:"):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL is set but the 'redis' package is not installed") from e
+        self._r = aioredis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any:
+        raw = await self._r.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await self._r.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._r.delete(*(self.prefix + k for k in keys))
+
+    async def incr(self, key: str) -> int:
+        return await self._r.incr(self.prefix + "gen:" + key)
+
+    async def counter(self, key: str) -> int:
+        return int(await self._r.get(self.prefix + "gen:" + key) or 0)
+
+    async def clear(self) -> None:
+        async for key in self._r.scan_iter(match=self.prefix + "*"):
+            await self._r.delete(key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class Cache:
+    """Read-through cache. Point reads are deleted on write; list results are
+    keyed on per-scope generation counters that writes bump."""
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = self.misses = self.invalidations = 0
+
+    async def get_or_load(
+        self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None, store: bool = True
+    ) -> Any:
+        """Cached value for key, else loader()'s; store=False skips writing it back."""
+        if not self.enabled:
+            return await loader()
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = await loader()
+        if value is not None and store:
+            await self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        return value
+
+    async def scoped_key(self, name: str, scopes: list[str], *parts: Any) -> str:
+        gens = [await self.backend.counter(s) for s in scopes]
+        return ":".join([name, *map(str, gens), *map(str, parts)])
+
+    async def invalidate(self, *keys: str) -> None:
+        self.invalidations += len(keys)
+        await self.backend.delete(*keys)
+
+    async def bump(self, *scopes: str) -> None:
+        self.invalidations += len(scopes)
+        for scope in scopes:
+            await self.backend.incr(scope)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+        self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+def _make_backend() -> CacheBackend:
+    if settings.cache_url:
+        return RedisBackend(settings.cache_url)
+    return MemoryBackend(settings.cache_max_entries)
+
+
+cache = Cache(_make_backend(), ttl=settings.cache_ttl, enabled=settings.cache_enabled)
+
+# --- Keys/scopes shared by the routers ---
+
+def user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def task_scopes(user_id: int | None) -> list[str]:
+    # "tasks" covers every task list; per-user lists also depend on their
+    # user scope, user-agnostic lists on "tasks:any"
+    return ["tasks", f"tasks:u{user_id}" if user_id is not None else "tasks:any"]
+
+async def invalidate_tasks(user_ids=None) -> None:
+    """Drop cached task lists touching `user_ids`; None means unknown -> all."""
+    if user_ids is None:
+        await cache.bump("tasks")
+    else:
+        await cache.bump("tasks:any", *(f"tasks:u{uid}" for uid in set(user_ids)))
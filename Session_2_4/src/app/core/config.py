@@ -1,8 +1,41 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
+
+# Async drivers used by the app for each sync URL scheme
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+def to_async_url(url: str) -> str:
+    u = make_url(url)
+    driver = ASYNC_DRIVERS.get(u.get_backend_name())
+    if driver and u.drivername != driver:
+        u = u.set(drivername=driver)
+    return u.render_as_string(hide_password=False)
 
 class Settings(BaseSettings):
     database_url: str  # you can also use MySqlDsn for extra validation
+    async_database_url: str | None = None  # derived from database_url when unset
+    db_pool_size: int = 10  # concurrent requests are bounded by pool_size + max_overflow
+    db_max_overflow: int = 10
+    db_pool_recycle: int = 1800  # seconds; keep below MySQL wait_timeout
+    database_replica_urls: str = ""  # comma-separated read replicas; empty -> all on primary
+    replica_pool_size: int = 10  # per replica engine
+    replica_max_overflow: int = 10
+    replica_pool_recycle: int = 1800
+    read_your_writes_seconds: float = 5.0  # a client's reads stay on the primary this long after it writes
+    bulk_chunk_size: int = 500  # rows per multi-row INSERT in the bulk endpoints
+    export_batch_size: int = 1000  # rows fetched per server-side cursor batch in /tasks/export
+    cache_enabled: bool = True
+    cache_ttl: float = 30.0  # seconds; writes invalidate earlier
+    cache_max_entries: int = 10_000
+    cache_url: str | None = None  # e.g. redis://localhost:6379/0 to share across workers
+    sync_overlap_seconds: float = 2.0  # `since` re-reads this far back; keep above the longest write transaction
+    events_history: int = 1000  # events kept for Last-Event-ID resume
+    events_queue_size: int = 1000  # per-subscriber backlog before it is told to resync
+    events_heartbeat: float = 15.0  # seconds between keep-alive pings on /events
+    events_url: str | None = None  # e.g. redis://localhost:6379/0 to fan out across workers
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 settings = Settings()
 DATABASE_URL = settings.database_url
+ASYNC_DATABASE_URL = settings.async_database_url or to_async_url(DATABASE_URL)
+REPLICA_URLS = [to_async_url(u.strip()) for u in settings.database_replica_urls.split(",") if u.strip()]
@@ -1,17 +1,118 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+import itertools
+import time
+from functools import partial
 
-from app.core.config import DATABASE_URL
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Session
+
+from app.core.config import ASYNC_DATABASE_URL, REPLICA_URLS, settings
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+@event.listens_for(Engine, "connect")
+def _sqlite_foreign_keys(dbapi_conn, record):
+    # SQLite (local dev) leaves FKs off by default; write paths rely on them
+    if "sqlite" in type(dbapi_conn).__module__:
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA foreign_keys=ON")
+        cur.close()
+
+class RoutingSession(Session):
+    """Sends reads to the replica in info["replica"] (if any); flushes go to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing:
+            return replica.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+class ReadRouter:
+    """Picks primary or a replica per request.
+
+    GET/HEAD requests read from replicas (round-robin) unless the same client
+    wrote within the read-your-writes window; everything else uses the primary.
+    Delta reads (`since`) always use the primary: their watermark only holds if
+    every row committed before it is visible.
+    Clients are identified by X-Client-Id, falling back to the peer address.
+    Write times are per process.
+    """
+
+    def __init__(self, sessionmaker: async_sessionmaker, replicas: list[AsyncEngine], window: float):
+        self.sessionmaker = sessionmaker
+        self.replicas = replicas
+        self.window = window
+        self._next = itertools.cycle(replicas) if replicas else None
+        self._last_write: dict[str, float] = {}
+
+    @staticmethod
+    def client_id(request: Request) -> str:
+        return request.headers.get("x-client-id") or (request.client.host if request.client else "")
+
+    def replica_for(self, request: Request) -> AsyncEngine | None:
+        if self._next is None or request.method not in ("GET", "HEAD") or "since" in request.query_params:
+            return None
+        wrote = self._last_write.get(self.client_id(request))
+        if wrote is not None and time.monotonic() - wrote < self.window:
+            return None
+        return next(self._next)
+
+    def note_write(self, request: Request) -> None:
+        if self._next is None or request.method in ("GET", "HEAD"):
+            return
+        now = time.monotonic()
+        self._last_write[self.client_id(request)] = now
+        if len(self._last_write) > 10_000:
+            # Drop clients whose window has passed
+            self._last_write = {k: t for k, t in self._last_write.items() if now - t < self.window}
+
+    def sessionmaker_for(self, request: Request):
+        return partial(self.sessionmaker, info={"replica": self.replica_for(request)})
+
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+)
+replica_engines = [
+    create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.replica_pool_size,
+        max_overflow=settings.replica_max_overflow,
+        pool_recycle=settings.replica_pool_recycle,
+    )
+    for url in REPLICA_URLS
+]
+# expire_on_commit=False: returned ORM objects stay readable after commit
+# without another (implicit, sync) round trip
+SessionLocal = async_sessionmaker(
+    bind=engine, sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False
+)
+db_router = ReadRouter(SessionLocal, replica_engines, settings.read_your_writes_seconds)
+
+def on_replica(db: AsyncSession) -> bool:
+    """Whether db reads from a replica. Replica reads may lag, so they must
+    not populate the shared cache: a write's invalidation could be undone."""
+    return db.info.get("replica") is not None
+
+async def dispose_engines() -> None:
+    for e in (engine, *replica_engines):
+        await e.dispose()
+
+def get_sessionmaker(request: Request):
+    # For handlers that need a session beyond the request, e.g. while a
+    # StreamingResponse body is still being produced
+    return db_router.sessionmaker_for(request)
 
-def get_db():
-    db = SessionLocal()
+async def get_db(request: Request):
     try:
-        yield db
+        async with db_router.sessionmaker_for(request)() as db:
+            yield db
     finally:
-        db.close()
\ No newline at end of file
+        db_router.note_write(request)
@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.pagination import paginate
+
+# Delta sync: rows whose updated_at is at or after `since`, tombstones
+# included. The watermark is the primary's clock read before the query
+# (ReadRouter never sends `since` reads to a replica), and each sync re-reads
+# an overlap window so rows committed late (or in the same clock tick) aren't
+# missed; clients merge by id, so repeats are harmless. updated_at is set when
+# a statement runs, not when it commits, so the overlap must exceed the longest
+# write transaction; bulk inserts commit per chunk to keep that short.
+
+async def delta_page(db, q, model, since: datetime, limit: int, cursor: str | None, schema) -> dict:
+    watermark = await db.scalar(select(func.now()))
+    q = q.filter(model.updated_at >= since - timedelta(seconds=settings.sync_overlap_seconds))
+    page = await paginate(db, q, model.id, limit, cursor)
+    return {
+        "items": [schema.model_validate(row).model_dump(mode="json") for row in page["items"]],
+        "next_cursor": page["next_cursor"],
+        "watermark": watermark.isoformat(),
+    }
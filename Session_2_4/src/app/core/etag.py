@@ -0,0 +1,21 @@
+import hashlib
+
+from fastapi import Request, Response
+
+# Strong ETags built from change versions, so a match can be answered
+# before the page is loaded or anything is serialised.
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2s(":".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 if If-None-Match matches etag, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    tags = {t.strip().removeprefix("W/") for t in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
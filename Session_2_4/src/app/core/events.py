@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Protocol
+
+from app.core.config import settings
+
+# Change feed. Write paths publish after commit; GET /events subscribers get
+# every event after the id they last saw. Event dicts look like
+#   {"id": "...", "type": "task.updated", "user_id": 3, "data": {...}}
+# Ids are opaque strings assigned by the backend.
+
+
+class Subscription(Protocol):
+    reset: bool  # the requested id fell out of history; client must refetch
+    head: str | None  # latest id when subscribing
+    async def get(self, timeout: float) -> dict | None: ...
+    async def close(self) -> None: ...
+
+
+class EventBackend(Protocol):
+    async def publish(self, events: list[dict]) -> None: ...
+    async def subscribe(self, last_id: str | None) -> Subscription: ...
+
+
+class LocalSubscription:
+    def __init__(self, backend: "LocalBackend", maxsize: int):
+        self._backend = backend
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self.reset = False
+        self.head = backend.head
+        self.lagged = False
+
+    async def get(self, timeout: float) -> dict | None:
+        if self.lagged and self.queue.empty():
+            # Fell too far behind and was dropped; tell the client to resync
+            return {"id": self._backend.head, "type": "reset", "user_id": None, "data": {}}
+        try:
+            if timeout <= 0:
+                return self.queue.get_nowait()
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except (asyncio.QueueEmpty, asyncio.TimeoutError):
+            return None
+
+    async def close(self) -> None:
+        self._backend._subs.discard(self)
+
+
+class LocalBackend:
+    """In-process fan-out with a bounded replay history. Ids are
+    "<epoch>-<seq>"; the epoch changes on restart so stale ids reset cleanly."""
+
+    def __init__(self, history: int = 1000, queue_size: int = 1000):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._seq = 0
+        self._history: deque[dict] = deque(maxlen=history)
+        self._subs: set[LocalSubscription] = set()
+        self.queue_size = max(queue_size, history)
+
+    @property
+    def head(self) -> str:
+        return f"{self.epoch}-{self._seq}"
+
+    def _seq_of(self, event_id: str) -> int | None:
+        epoch, _, seq = event_id.partition("-")
+        return int(seq) if epoch == self.epoch and seq.isdigit() else None
+
+    async def publish(self, events: list[dict]) -> None:
+        for event in events:
+            self._seq += 1
+            event = {"id": self.head, **event}
+            self._history.append(event)
+            for sub in list(self._subs):
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    sub.lagged = True
+                    self._subs.discard(sub)
+
+    async def subscribe(self, last_id: str | None) -> LocalSubscription:
+        # No await between the history snapshot and registering, so nothing
+        # published in between can be missed or duplicated
+        sub = LocalSubscription(self, self.queue_size)
+        if last_id is not None:
+            seq = self._seq_of(last_id)
+            oldest = self._seq_of(self._history[0]["id"]) if self._history else self._seq + 1
+            if seq is None or seq > self._seq or seq < oldest - 1:
+                sub.reset = True
+            else:
+                for event in self._history:
+                    if self._seq_of(event["id"]) > seq:
+                        sub.queue.put_nowait(event)
+        self._subs.add(sub)
+        return sub
+
+
+class RedisSubscription:
+    def __init__(self, backend: "RedisStreamBackend", cursor: str, reset: bool, head: str | None):
+        self._backend = backend
+        self._cursor = cursor
+        self._buffer: deque[dict] = deque()
+        self.reset = reset
+        self.head = head
+
+    async def get(self, timeout: float) -> dict | None:
+        if not self._buffer:
+            block = int(timeout * 1000) if timeout > 0 else None
+            resp = await self._backend._r.xread({self._backend.stream: self._cursor}, count=100, block=block)
+            for _, entries in resp or []:
+                for entry_id, fields in entries:
+                    self._cursor = entry_id.decode()
+                    self._buffer.append({"id": self._cursor, **json.loads(fields[b"e"])})
+        return self._buffer.popleft() if self._buffer else None
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisStreamBackend:
+    """Cross-worker feed on a Redis stream (XADD/XREAD). Requires the optional `redis` package."""
+
+    def __init__(self, url: str, stream: str = "tasktracker:events", history: int = 1000):
+        try:
+            from redis import asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("EVENTS_URL is set but the 'redis' package is not installed") from e
+        self._r = aioredis.from_url(url)
+        self.stream = stream
+        self.history = history
+
+    async def publish(self, events: list[dict]) -> None:
+        pipe = self._r.pipeline()
+        for event in events:
+            pipe.xadd(self.stream, {"e": json.dumps(event)}, maxlen=self.history, approximate=True)
+        await pipe.execute()
+
+    @staticmethod
+    def _key(event_id: str) -> tuple[int, int]:
+        ms, _, seq = event_id.partition("-")
+        return int(ms), int(seq or 0)
+
+    async def subscribe(self, last_id: str | None) -> RedisSubscription:
+        newest = await self._r.xrevrange(self.stream, count=1)
+        head = newest[0][0].decode() if newest else "0-0"
+        if last_id is None:
+            return RedisSubscription(self, head, reset=False, head=head)
+        oldest = await self._r.xrange(self.stream, count=1)
+        try:
+            key = self._key(last_id)
+        except ValueError:
+            return RedisSubscription(self, head, reset=True, head=head)
+        if key > self._key(head) or (oldest and key < self._key(oldest[0][0].decode())):
+            return RedisSubscription(self, head, reset=True, head=head)
+        return RedisSubscription(self, last_id, reset=False, head=head)
+
+
+class Broker:
+    def __init__(self, backend: EventBackend):
+        self.backend = backend
+
+    async def publish(self, type: str, user_id: int | None, data: dict[str, Any]) -> None:
+        await self.backend.publish([{"type": type, "user_id": user_id, "data": data}])
+
+    async def publish_many(self, type: str, items: list[tuple[int | None, dict[str, Any]]]) -> None:
+        if items:
+            await self.backend.publish([{"type": type, "user_id": uid, "data": data} for uid, data in items])
+
+    async def subscribe(self, last_id: str | None) -> Subscription:
+        return await self.backend.subscribe(last_id)
+
+
+def _make_backend() -> EventBackend:
+    if settings.events_url:
+        return RedisStreamBackend(settings.events_url, history=settings.events_history)
+    return LocalBackend(settings.events_history, settings.events_queue_size)
+
+
+broker = Broker(_make_backend())
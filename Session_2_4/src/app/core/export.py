@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+# Encoders take batches of plain row tuples (no ORM objects, no Pydantic) and
+# yield bytes, so memory stays bounded by one batch whatever the table size.
+
+COLUMNS = ("id", "user_id", "title", "completed", "created_at")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+async def ndjson(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        lines = (
+            json.dumps({"id": r[0], "user_id": r[1], "title": r[2], "completed": bool(r[3]), "created_at": _iso(r[4])})
+            for r in batch
+        )
+        yield ("\n".join(lines) + "\n").encode()
+
+async def csv_rows(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    async for batch in batches:
+        writer.writerows((r[0], r[1], r[2], bool(r[3]), _iso(r[4])) for r in batch)
+        yield buf.getvalue().encode()
+        buf.seek(0); buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()  # header only, for an empty export
+
+async def arrow(batches: AsyncIterator[Sequence[tuple]]) -> AsyncIterator[bytes]:
+    import pyarrow as pa  # heavy; only needed for this format
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("title", pa.string()),
+        ("completed", pa.bool_()),
+        # Naive, like the NDJSON/CSV output: DATETIME carries no zone
+        ("created_at", pa.timestamp("us")),
+    ])
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for batch in batches:
+            cols = list(zip(*batch))
+            writer.write_batch(pa.record_batch([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema))
+            yield sink.getvalue()
+            sink.seek(0); sink.truncate()
+    yield sink.getvalue()  # end-of-stream marker (and schema if there were no rows)
+
+ENCODERS = {"ndjson": ndjson, "csv": csv_rows, "arrow": arrow}
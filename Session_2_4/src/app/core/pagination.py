@@ -0,0 +1,29 @@
+import base64
+import binascii
+
+from fastapi import HTTPException
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Cursors are opaque to clients: the last id of the page, base64-encoded.
+# Keyset on the primary key means each page is an index range scan
+# (WHERE id < :cursor ORDER BY id DESC LIMIT n) instead of OFFSET.
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def paginate(db, q, id_col, limit: int, cursor: str | None) -> dict:
+    if cursor is not None:
+        q = q.filter(id_col < decode_cursor(cursor))
+    # One extra row tells us whether there is a next page
+    rows = (await db.scalars(q.order_by(id_col.desc()).limit(limit + 1))).all()
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
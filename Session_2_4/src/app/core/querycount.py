@@ -0,0 +1,86 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Per-request SQL accounting. Listeners sit on the Engine class so every
+# engine (app, tests, async engines' sync cores) is covered; statements
+# only count while a QueryStats is active in the current context.
+
+log = logging.getLogger(__name__)
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[str] = field(default_factory=list)
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - conn.info["query_start"].pop()
+    stats.statements.append(statement)
+
+@contextmanager
+def count_queries():
+    """Collect statements executed in this context (and tasks spawned from it)."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+class QueryAccountingMiddleware:
+    """Adds X-DB-Queries / X-DB-Time-ms to every HTTP response.
+
+    Plain ASGI, so no extra task or stream per request. Counting runs until
+    the last body message. A streamed body (e.g. /tasks/export) queries after
+    its headers are sent, so its headers hold the count so far and the full
+    total is logged when the body ends.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start: Message | None = None
+        streamed = False
+        with count_queries() as qs:
+            async def send_with_stats(message: Message) -> None:
+                nonlocal start, streamed
+                if message["type"] == "http.response.start":
+                    start = message  # held until the first body message
+                    return
+                if message["type"] == "http.response.body":
+                    if start is not None:
+                        headers = MutableHeaders(scope=start)
+                        headers["X-DB-Queries"] = str(qs.count)
+                        headers["X-DB-Time-ms"] = f"{qs.seconds * 1000:.2f}"
+                        streamed = message.get("more_body", False)
+                        await send(start)
+                        start = None
+                    if streamed and not message.get("more_body", False):
+                        log.info("%s %s: %d queries, %.2f ms", scope["method"], scope["path"], qs.count, qs.seconds * 1000)
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
@@ -0,0 +1,83 @@
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.dialects import mysql, sqlite
+
+from app.models.task import Task
+from app.models.task_stats import TaskStats
+
+# Write paths call these inside their own transaction, before commit, so
+# the counters move atomically with the rows they describe. Every call also
+# bumps the user's `version`, the change marker behind task list ETags.
+
+def _upsert(dialect: str, values: list[dict]):
+    tbl = TaskStats.__table__
+    if dialect == "mysql":
+        stmt = mysql.insert(tbl).values(values)
+        return stmt.on_duplicate_key_update(
+            total=tbl.c.total + stmt.inserted.total,
+            completed=tbl.c.completed + stmt.inserted.completed,
+            version=tbl.c.version + 1,
+        )
+    stmt = sqlite.insert(tbl).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[tbl.c.user_id],
+        set_={
+            "total": tbl.c.total + stmt.excluded.total,
+            "completed": tbl.c.completed + stmt.excluded.completed,
+            "version": tbl.c.version + 1,
+        },
+    )
+
+async def apply_deltas(db, deltas: dict[int, tuple[int, int]]) -> None:
+    """Add {user_id: (d_total, d_completed)} to the counters in one statement."""
+    values = [{"user_id": uid, "total": t, "completed": c, "version": 1} for uid, (t, c) in deltas.items()]
+    if values:
+        await db.execute(_upsert(db.bind.dialect.name, values))
+
+async def apply_delta(db, user_id: int, d_total: int, d_completed: int) -> None:
+    await apply_deltas(db, {user_id: (d_total, d_completed)})
+
+def completed_count():
+    return func.sum(case((Task.completed.is_(True), 1), else_=0))
+
+async def counts_by_user(db, conds: list) -> dict[int, tuple[int, int]]:
+    """(total, completed) per user for tasks matching conds, rows locked for the write that follows."""
+    q = (
+        select(Task.user_id, func.count(), completed_count())
+        .where(*conds)
+        .group_by(Task.user_id)
+        .with_for_update()
+    )
+    return {uid: (n, int(done or 0)) for uid, n, done in (await db.execute(q)).all()}
+
+async def tasks_version(db, user_id: int | None) -> int:
+    """Change marker for a user's tasks, or for all tasks (O(users)) when user_id is None."""
+    if user_id is not None:
+        q = select(TaskStats.version).where(TaskStats.user_id == user_id)
+    else:
+        q = select(func.sum(TaskStats.version))
+    return int(await db.scalar(q) or 0)
+
+async def rebuild(db) -> int:
+    """Recompute task_stats from tasks; returns the number of user rows.
+
+    Rows are updated in place with their version bumped, never deleted and
+    re-inserted: versions only ever grow, so no ETag issued before the
+    rebuild can match afterwards.
+    """
+    live = Task.deleted_at.is_(None)
+    mine = Task.user_id == TaskStats.user_id
+    updated = await db.execute(
+        update(TaskStats).values(
+            total=select(func.count()).where(live, mine).scalar_subquery(),
+            completed=select(func.coalesce(completed_count(), 0)).where(live, mine).scalar_subquery(),
+            version=TaskStats.version + 1,
+        )
+    )
+    agg = (
+        select(Task.user_id, func.count(), completed_count())
+        .where(live, Task.user_id.not_in(select(TaskStats.user_id)))
+        .group_by(Task.user_id)
+    )
+    inserted = await db.execute(insert(TaskStats).from_select(["user_id", "total", "completed"], agg))
+    await db.commit()
+    return updated.rowcount + inserted.rowcount
@@ -1,5 +1,6 @@
 import sys
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Add the src directory to Python path
@@ -7,16 +8,31 @@ src_path = Path(__file__).parent.parent
 sys.path.insert(0, str(src_path))
 
 from fastapi import FastAPI
-from app.core.db import Base, engine
-from app.api import users, tasks
+from app.core import bulk
+from app.core.db import Base, dispose_engines, engine
+from app.core.querycount import QueryAccountingMiddleware
+from app.api import cache, events, stats, users, tasks
 import uvicorn
 
-# Create tables in dev (prod uses Alembic)
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables in dev (prod uses Alembic)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await bulk.detect_autoinc_step(conn)
+    yield
+    await dispose_engines()
+
+app = FastAPI(title="Task Tracker", lifespan=lifespan)
+
+# Statement count and DB time per request, for budgets and debugging
+app.add_middleware(QueryAccountingMiddleware)
 
-app = FastAPI(title="Task Tracker")
 app.include_router(users.router)
 app.include_router(tasks.router)
+app.include_router(stats.router)
+app.include_router(events.router)
+app.include_router(cache.router)
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000, reload=False)
\ No newline at end of file
+    uvicorn.run(app, host="127.0.0.1", port=8000, reload=False)
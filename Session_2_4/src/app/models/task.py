@@ -1,10 +1,14 @@
 from datetime import datetime
-from sqlalchemy import DateTime, ForeignKey, String, Boolean, func
+from sqlalchemy import DateTime, ForeignKey, Index, String, Boolean, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.core.db import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination for filtered lists: WHERE user_id/completed, ORDER BY id
+        Index("ix_tasks_user_completed_id", "user_id", "completed", "id"),
+    )
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     title: Mapped[str] = mapped_column(String(255))
@@ -12,3 +16,8 @@ class Task(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True
+    )
+    # Soft delete: deleted rows stay as tombstones for `since` delta sync
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
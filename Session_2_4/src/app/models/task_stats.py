@@ -0,0 +1,12 @@
+from sqlalchemy import ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.db import Base
+
+class TaskStats(Base):
+    """Per-user task counters, kept in step with `tasks` by the write paths."""
+    __tablename__ = "task_stats"
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # Bumped by every write to this user's tasks; feeds task list ETags
+    version: Mapped[int] = mapped_column(Integer, default=1, server_default="1")
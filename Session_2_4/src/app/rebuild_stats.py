@@ -0,0 +1,18 @@
+"""Recompute the task_stats summary table from tasks.
+
+Usage (from src/): python -m app.rebuild_stats
+"""
+import asyncio
+
+from app.core.db import SessionLocal, dispose_engines
+from app.core.stats import rebuild
+import app.models.user  # noqa: F401 -> register models
+
+async def main() -> None:
+    async with SessionLocal() as db:
+        n = await rebuild(db)
+    await dispose_engines()
+    print(f"task_stats rebuilt: {n} user rows")
+
+if __name__ == "__main__":
+    asyncio.run(main())
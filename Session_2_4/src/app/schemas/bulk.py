@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: Literal["created", "error"]
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    results: list[BulkItemResult]
+
+class BulkAffected(BaseModel):
+    affected: int
@@ -0,0 +1,12 @@
+from typing import Generic, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
+
+class DeltaPage(Page[T], Generic[T]):
+    # Pass back as `since` on the next sync (take it from the first page)
+    watermark: str
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, ConfigDict, Field
+
+class TaskCounts(BaseModel):
+    total: int
+    completed: int
+    completion_rate: float
+
+class UserTaskCounts(TaskCounts):
+    user_id: int
+
+class TaskStatsOut(BaseModel):
+    global_: TaskCounts = Field(alias="global")
+    users: list[UserTaskCounts]
+    model_config = ConfigDict(populate_by_name=True)
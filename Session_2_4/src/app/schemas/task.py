@@ -1,4 +1,5 @@
-from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 
 class TaskCreate(BaseModel):
@@ -15,3 +16,13 @@ class TaskOut(BaseModel):
     title: str
     completed: bool
     model_config = ConfigDict(from_attributes=True)
+
+class TaskChange(TaskOut):
+    updated_at: datetime
+    deleted_at: Optional[datetime] = None  # set -> tombstone
+
+class TaskIds(BaseModel):
+    ids: Optional[list[int]] = Field(None, max_length=10_000)
+
+class TaskBulkUpdate(TaskUpdate, TaskIds):
+    pass
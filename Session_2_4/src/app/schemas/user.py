@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, EmailStr, ConfigDict
 
 class UserCreate(BaseModel):
@@ -8,4 +9,8 @@ class UserOut(BaseModel):
     id: int
     email: EmailStr
     full_name: str
+    version: int
     model_config = ConfigDict(from_attributes=True)
+
+class UserChange(UserOut):
+    updated_at: datetime
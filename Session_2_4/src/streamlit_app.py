@@ -11,32 +11,87 @@ def api() -> httpx.Client:
     # One client per rerun; Streamlit reruns the script on interactions
     return httpx.Client(base_url=API_URL, timeout=10.0)
 
-@st.cache_data(ttl=5, show_spinner=False)
-def fetch_users():
-    # You don't have a list endpoint in your API; fetch recent via a cheap trick:
-    # If you add GET /users, use it here. For now we’ll just try ids 1..50.
+EPOCH = "1970-01-01T00:00:00"
+RESYNC_AFTER = 60  # seconds; backstop in case change events were missed
+
+def sync_table(name: str, path: str) -> pd.DataFrame:
+    # Local copy in session_state; a refresh merges only the rows changed
+    # since the last watermark (tombstones remove rows), so its cost scales
+    # with the amount of change rather than the table size
+    state = st.session_state
+    df = state.get(f"{name}_df")
+    fresh = time.time() - state.get(f"{name}_synced", 0) < RESYNC_AFTER
+    if df is not None and fresh and not state.get(f"{name}_dirty"):
+        return df
+    since = state.get(f"{name}_since", EPOCH)
+    rows, watermark, cursor = [], None, None
     with api() as c:
-        users = c.get("/users").json()
-    return pd.DataFrame(users)
+        while True:
+            r = c.get(path, params={"since": since, "limit": 500, **({"cursor": cursor} if cursor else {})})
+            r.raise_for_status()
+            page = r.json()
+            watermark = watermark or page["watermark"]  # first page's is the one to resume from
+            rows.extend(page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+    changes = pd.DataFrame(rows)
+    if df is None:
+        df = pd.DataFrame()
+    if not changes.empty:
+        kept = df[~df["id"].isin(changes["id"])] if not df.empty else df
+        df = pd.concat([kept, changes], ignore_index=True)
+        if "deleted_at" in df:
+            df = df[df["deleted_at"].isna()].drop(columns="deleted_at")
+    state[f"{name}_df"], state[f"{name}_since"] = df, watermark
+    state[f"{name}_synced"], state[f"{name}_dirty"] = time.time(), False
+    return df
+
+def fetch_users():
+    return sync_table("users", "/users")
 
-@st.cache_data(ttl=5, show_spinner=False)
 def fetch_tasks(user_id: int | None = None, completed: bool | None = None):
-    params = {}
-    if user_id is not None: params["user_id"] = user_id
-    if completed is not None: params["completed"] = str(completed).lower()
+    df = sync_table("tasks", "/tasks")
+    if df.empty:
+        return df
+    if user_id is not None:
+        df = df[df["user_id"] == user_id]
+    if completed is not None:
+        df = df[df["completed"] == completed]
+    return df
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_stats():
+    # Served from the task_stats summary table; no need to pull every task
     with api() as c:
-        r = c.get("/tasks", params=params)
+        r = c.get("/stats/tasks")
         r.raise_for_status()
-        return pd.DataFrame(r.json())
+        return r.json()
 
 def invalidate_cache():
-    fetch_users.clear()
-    fetch_tasks.clear()
+    # Local tables pull a delta on next use; stats are small, refetch them
+    st.session_state["users_dirty"] = st.session_state["tasks_dirty"] = True
+    fetch_stats.clear()
+
+def sync_changes():
+    # Catch up on the /events change feed; local tables only sync when
+    # something actually changed (RESYNC_AFTER is just a backstop)
+    last = st.session_state.get("last_event_id")
+    with api() as c:
+        r = c.get("/events", params={"follow": "false"}, headers={"Last-Event-ID": last} if last else {})
+    lines = r.text.splitlines()
+    ids = [l[len("id: "):] for l in lines if l.startswith("id: ")]
+    kinds = {l[len("event: "):] for l in lines if l.startswith("event: ")}
+    if ids:
+        st.session_state["last_event_id"] = ids[-1]
+    if kinds - {"ready"}:
+        invalidate_cache()
 
 # -------- UI --------
 st.set_page_config(page_title="Task Tracker UI", layout="wide")
 
 st.title("Task Tracker (FastAPI + MySQL + Streamlit)")
+sync_changes()
 
 # --- Create User ---
 with st.expander("➕ Create user", expanded=True):
@@ -66,6 +121,15 @@ if users_df.empty:
 else:
     st.dataframe(users_df, width='stretch', hide_index=True)
 
+# --- Stats ---
+stats = fetch_stats()
+s1, s2, s3 = st.columns(3)
+s1.metric("Tasks", stats["global"]["total"])
+s2.metric("Completed", stats["global"]["completed"])
+s3.metric("Completion rate", f'{stats["global"]["completion_rate"]:.0%}')
+if stats["users"]:
+    st.dataframe(pd.DataFrame(stats["users"]), width='stretch', hide_index=True)
+
 # --- Create Task ---
 with st.expander("📝 Create task", expanded=True):
     with st.form("create_task"):
@@ -1,7 +1,10 @@
+import asyncio
 import os
 import pytest
+import pytest_asyncio
 from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 # Load .env.test file before reading environment variables
 from dotenv import load_dotenv
@@ -21,18 +24,25 @@ if SRC.exists():
 
 # Import app bits AFTER sys.path tweak
 from app.core.db import Base           # your Declarative Base (no engine here)
+from app.core.config import to_async_url
+from app.core.cache import cache
 from app.main import app as fastapi_app               # FastAPI app
 import app.models.user                 # noqa: F401 -> register models
 import app.models.task                 # noqa: F401 -> register models
+import app.models.task_stats           # noqa: F401 -> register models
 
 # Test DB URL (now reads from .env.test file)
 TEST_DB_URL = os.getenv(
     "TEST_DATABASE_URL"
 )
 
-# Build an engine/session JUST for tests
+# Sync engine JUST for schema setup and cleanup
 engine = create_engine(TEST_DB_URL, pool_pre_ping=True, future=True)
-TestingSessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+# Async engine/session for the app and async tests. NullPool because every
+# TestClient runs its own event loop and pooled async connections can't be
+# shared across loops.
+async_engine = create_async_engine(to_async_url(TEST_DB_URL), poolclass=NullPool)
+TestingSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -52,21 +62,21 @@ def clean_tables():
     with engine.connect() as conn:
         conn.execute(text("SET FOREIGN_KEY_CHECKS=0"))
         # Truncate in child->parent order to be explicit
+        conn.execute(text("TRUNCATE TABLE task_stats"))
         conn.execute(text("TRUNCATE TABLE tasks"))
         conn.execute(text("TRUNCATE TABLE users"))
         conn.execute(text("SET FOREIGN_KEY_CHECKS=1"))
         conn.commit()
+    # Truncation reuses ids, so cached reads from earlier tests must go too
+    asyncio.run(cache.clear())
     yield
 
 
-@pytest.fixture
-def db_session():
-    """Yield a fresh ORM session per test."""
-    session = TestingSessionLocal()
-    try:
+@pytest_asyncio.fixture
+async def db_session():
+    """Yield a fresh async ORM session per test."""
+    async with TestingSessionLocal() as session:
         yield session
-    finally:
-        session.close()
 
 
 # ---- FastAPI TestClient, overriding get_db dependency ----
@@ -74,20 +84,30 @@ from fastapi.testclient import TestClient
 
 
 @pytest.fixture
-def client(db_session):
-    # Override the app's get_db dependency to use the testing session
-    def _get_db_override():
-        try:
-            yield db_session
-        finally:
-            pass
+def client():
+    # Override the app's get_db dependency to use the testing database.
+    # The session is opened inside the app's event loop, one per request.
+    async def _get_db_override():
+        async with TestingSessionLocal() as session:
+            yield session
 
     # Import the function to override
-    from app.core.db import get_db  # original dependency
+    from app.core.db import get_db, get_sessionmaker  # original dependencies
     fastapi_app.dependency_overrides[get_db] = _get_db_override
+    fastapi_app.dependency_overrides[get_sessionmaker] = lambda: TestingSessionLocal
 
     with TestClient(fastapi_app) as c:
         yield c
 
     # Clean up override
     fastapi_app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """Assert a response stayed within N SQL statements (X-DB-Queries header)."""
+    def check(resp, budget: int):
+        n = int(resp.headers["X-DB-Queries"])
+        assert n <= budget, f"{resp.request.method} {resp.request.url.path}: {n} queries, budget {budget}"
+        return resp
+    return check
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from app.core.events import LocalBackend
+
+
+def _parse(body: str) -> list[dict]:
+    events = []
+    for block in body.replace("\r\n", "\n").split("\n\n"):
+        fields = {}
+        for line in block.splitlines():
+            key, _, value = line.partition(": ")
+            fields[key] = value
+        if "event" in fields:
+            events.append({"id": fields.get("id"), "type": fields["event"], "data": json.loads(fields["data"])})
+    return events
+
+
+def test_events_resume_and_filter(client):
+    ready = _parse(client.get("/events", params={"follow": "false"}).text)
+    assert [e["type"] for e in ready] == ["ready"]
+    since = ready[0]["id"]
+
+    a = client.post("/users", json={"email": "a@ev.com", "full_name": "A"}).json()["id"]
+    b = client.post("/users", json={"email": "b@ev.com", "full_name": "B"}).json()["id"]
+    tid = client.post("/tasks", json={"user_id": a, "title": "t"}).json()["id"]
+    client.post("/tasks", json={"user_id": b, "title": "other"})
+    client.patch(f"/tasks/{tid}", json={"completed": True})
+    client.delete(f"/tasks/{tid}")
+
+    body = client.get("/events", params={"follow": "false", "user_id": a}, headers={"Last-Event-ID": since}).text
+    events = _parse(body)
+    assert [e["type"] for e in events] == ["user.created", "task.created", "task.updated", "task.deleted"]
+    assert events[2]["data"]["completed"] is True
+
+    # Resuming from the last seen id yields nothing new
+    assert _parse(client.get("/events", params={"follow": "false", "last_event_id": events[-1]["id"]}).text) == []
+    # Unknown ids ask the client to resync
+    assert _parse(client.get("/events", params={"follow": "false", "last_event_id": "bogus-1"}).text)[0]["type"] == "reset"
+
+
+@pytest.mark.asyncio
+async def test_local_backend_history_and_lag():
+    backend = LocalBackend(history=3, queue_size=3)
+    start = backend.head
+    await backend.publish([{"type": "t", "user_id": None, "data": {"n": i}} for i in range(5)])
+    assert (await backend.subscribe(start)).reset  # fell out of history
+
+    sub = await backend.subscribe(backend.head)
+    await backend.publish([{"type": "t", "user_id": None, "data": {"n": i}} for i in range(4)])
+    got = [await sub.get(0) for _ in range(4)]
+    assert [e["data"]["n"] for e in got[:3]] == [0, 1, 2] and got[3]["type"] == "reset"
@@ -0,0 +1,42 @@
+import pytest
+from app.core.stats import rebuild, tasks_version
+
+
+def _snapshot(client):
+    return client.get("/stats/tasks").json()
+
+
+def test_task_stats_follow_writes(client):
+    a = client.post("/users", json={"email": "a@s.com", "full_name": "A"}).json()["id"]
+    b = client.post("/users", json={"email": "b@s.com", "full_name": "B"}).json()["id"]
+    t1 = client.post("/tasks", json={"user_id": a, "title": "one"}).json()["id"]
+    client.post("/tasks/bulk", json=[{"user_id": b, "title": f"b{i}"} for i in range(3)])
+
+    client.patch(f"/tasks/{t1}", json={"completed": True})
+    client.patch(f"/tasks/{t1}", json={"completed": True})  # no-op, must not double count
+    client.patch("/tasks", params={"user_id": b}, json={"completed": True})
+    client.request("DELETE", "/tasks", params={"user_id": b, "completed": True})
+    client.post("/tasks", json={"user_id": b, "title": "b-new"})
+
+    stats = _snapshot(client)
+    assert stats["global"] == {"total": 2, "completed": 1, "completion_rate": 0.5}
+    by_user = {u["user_id"]: u for u in stats["users"]}
+    assert by_user[a]["completed"] == 1 and by_user[b]["total"] == 1
+    assert client.get("/stats/tasks", params={"user_id": a}).json()["users"] == [by_user[a]]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental(client, db_session):
+    uid = client.post("/users", json={"email": "r@s.com", "full_name": "R"}).json()["id"]
+    tid = client.post("/tasks", json={"user_id": uid, "title": "x"}).json()["id"]
+    client.post("/tasks", json={"user_id": uid, "title": "y"})
+    client.patch(f"/tasks/{tid}", json={"completed": True})
+    client.delete(f"/tasks/{tid}")
+    before = _snapshot(client)
+    versions = await tasks_version(db_session, uid), await tasks_version(db_session, None)
+
+    assert await rebuild(db_session) == 1
+    assert _snapshot(client) == before
+    # Versions keep growing so ETags issued before the rebuild can't match
+    assert await tasks_version(db_session, uid) > versions[0]
+    assert await tasks_version(db_session, None) > versions[1]
@@ -9,7 +9,7 @@ def test_create_list_update_delete_task(client):
     assert t["completed"] is False
 
     # list tasks by user
-    lst = client.get(f"/tasks?user_id={uid}").json()
+    lst = client.get(f"/tasks?user_id={uid}").json()["items"]
     assert any(item["id"] == tid for item in lst)
 
     # mark done
@@ -21,5 +21,142 @@ def test_create_list_update_delete_task(client):
     assert resp.status_code == 204
 
     # verify gone
-    lst2 = client.get(f"/tasks?user_id={uid}").json()
-    assert all(item["id"] != tid for item in lst2)
\ No newline at end of file
+    lst2 = client.get(f"/tasks?user_id={uid}").json()["items"]
+    assert all(item["id"] != tid for item in lst2)
+
+
+def test_list_tasks_keyset_pagination(client):
+    uid = client.post("/users", json={"email": "p@p.com", "full_name": "Pager"}).json()["id"]
+    ids = [client.post("/tasks", json={"user_id": uid, "title": f"T{i}"}).json()["id"] for i in range(5)]
+
+    page1 = client.get("/tasks", params={"user_id": uid, "limit": 2}).json()
+    assert [t["id"] for t in page1["items"]] == ids[::-1][:2]
+    assert page1["next_cursor"]
+
+    seen = [t["id"] for t in page1["items"]]
+    cursor = page1["next_cursor"]
+    while cursor:
+        page = client.get("/tasks", params={"user_id": uid, "limit": 2, "cursor": cursor}).json()
+        seen += [t["id"] for t in page["items"]]
+        cursor = page["next_cursor"]
+    assert seen == ids[::-1]
+
+    assert client.get("/tasks", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def test_bulk_create_tasks(client):
+    uid = client.post("/users", json={"email": "b@b.com", "full_name": "Bulk"}).json()["id"]
+    items = [{"user_id": uid, "title": f"T{i}"} for i in range(3)] + [{"user_id": uid + 999, "title": "orphan"}, {"title": "no user"}]
+
+    resp = client.post("/tasks/bulk", json=items)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["created"] == 3 and data["failed"] == 2
+    assert [r["status"] for r in data["results"]] == ["created"] * 3 + ["error"] * 2
+    assert data["results"][3]["detail"] == "User does not exist"
+
+    listed = client.get("/tasks", params={"user_id": uid}).json()["items"]
+    assert sorted(t["id"] for t in listed) == [r["id"] for r in data["results"][:3]]
+
+
+def test_bulk_update_and_delete_tasks(client):
+    uid = client.post("/users", json={"email": "s@s.com", "full_name": "Sets"}).json()["id"]
+    items = [{"user_id": uid, "title": f"T{i}"} for i in range(4)]
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=items).json()["results"]]
+
+    resp = client.patch("/tasks", params={"user_id": uid}, json={"completed": True})
+    assert resp.json() == {"affected": 4}
+    assert client.patch("/tasks", json={"completed": True}).status_code == 400
+
+    resp = client.patch("/tasks", json={"ids": ids[:1], "completed": False})
+    assert resp.json() == {"affected": 1}
+
+    resp = client.request("DELETE", "/tasks", params={"user_id": uid, "completed": True})
+    assert resp.json() == {"affected": 3}
+    resp = client.request("DELETE", "/tasks", json={"ids": ids})
+    assert resp.json() == {"affected": 1}
+    assert client.get("/tasks", params={"user_id": uid}).json()["items"] == []
+
+
+def test_task_list_cache_invalidated_on_write(client):
+    uid = client.post("/users", json={"email": "c@c.com", "full_name": "Cache"}).json()["id"]
+    assert client.get("/tasks", params={"user_id": uid}).json()["items"] == []
+    assert client.get("/tasks", params={"user_id": uid}).json()["items"] == []
+    stats = client.get("/cache/stats").json()
+    assert stats["hits"] >= 1
+
+    tid = client.post("/tasks", json={"user_id": uid, "title": "New"}).json()["id"]
+    assert [t["id"] for t in client.get("/tasks", params={"user_id": uid}).json()["items"]] == [tid]
+    assert [t["id"] for t in client.get("/tasks").json()["items"]] == [tid]
+
+    client.patch(f"/tasks/{tid}", json={"completed": True})
+    assert client.get("/tasks", params={"completed": True}).json()["items"][0]["id"] == tid
+    client.request("DELETE", "/tasks", json={"ids": [tid]})
+    assert client.get("/tasks").json()["items"] == []
+
+
+def test_export_tasks_formats(client):
+    import io
+    import json
+    import pyarrow as pa
+
+    uid = client.post("/users", json={"email": "e@e.com", "full_name": "Export"}).json()["id"]
+    client.post("/tasks/bulk", json=[{"user_id": uid, "title": f"T{i}"} for i in range(3)])
+    client.patch("/tasks", params={"user_id": uid}, json={"completed": True})
+    client.post("/tasks", json={"user_id": uid, "title": "open"})
+
+    resp = client.get("/tasks/export", params={"completed": True})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["title"] for r in rows] == ["T0", "T1", "T2"]
+
+    lines = client.get("/tasks/export", params={"format": "csv", "user_id": uid}).text.splitlines()
+    assert lines[0] == "id,user_id,title,completed,created_at" and len(lines) == 5
+
+    table = pa.ipc.open_stream(io.BytesIO(client.get("/tasks/export?format=arrow").content)).read_all()
+    assert table.num_rows == 4 and table.column("completed").to_pylist() == [True, True, True, False]
+
+    resp = client.get("/tasks/export", params={"created_to": "2000-01-01T00:00:00"})
+    assert resp.text == ""
+
+
+def test_list_tasks_etag(client, query_budget):
+    uid = client.post("/users", json={"email": "et@t.com", "full_name": "ETag"}).json()["id"]
+    tid = client.post("/tasks", json={"user_id": uid, "title": "a"}).json()["id"]
+
+    etag = client.get("/tasks", params={"user_id": uid}).headers["ETag"]
+    resp = query_budget(client.get("/tasks", params={"user_id": uid}, headers={"If-None-Match": etag}), 0)
+    assert resp.status_code == 304 and resp.content == b""
+
+    client.patch(f"/tasks/{tid}", json={"title": "renamed"})
+    resp = client.get("/tasks", params={"user_id": uid}, headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.json()["items"][0]["title"] == "renamed"
+    assert client.get("/tasks", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_delta_sync_with_tombstones(client):
+    uid = client.post("/users", json={"email": "d@d.com", "full_name": "Delta"}).json()["id"]
+    keep = client.post("/tasks", json={"user_id": uid, "title": "keep"}).json()["id"]
+    gone = client.post("/tasks", json={"user_id": uid, "title": "gone"}).json()["id"]
+
+    full = client.get("/tasks", params={"since": "1970-01-01T00:00:00"}).json()
+    assert {t["id"] for t in full["items"]} == {keep, gone}
+    assert all(t["deleted_at"] is None for t in full["items"])
+
+    client.patch(f"/tasks/{keep}", json={"title": "kept"})
+    client.delete(f"/tasks/{gone}")
+    delta = client.get("/tasks", params={"since": full["watermark"]}).json()
+    by_id = {t["id"]: t for t in delta["items"]}
+    assert by_id[keep]["title"] == "kept" and by_id[keep]["deleted_at"] is None
+    assert by_id[gone]["deleted_at"] is not None
+
+    # Tombstones never show up in normal reads or writes
+    assert [t["id"] for t in client.get("/tasks").json()["items"]] == [keep]
+    assert client.patch(f"/tasks/{gone}", json={"title": "x"}).status_code == 404
+
+    users = client.get("/users", params={"since": "1970-01-01T00:00:00"}).json()
+    assert [u["id"] for u in users["items"]] == [uid] and users["watermark"]
+
+    # Rows leaving a completed filter would never reach the client as changes
+    r = client.get("/tasks", params={"since": full["watermark"], "completed": False})
+    assert r.status_code == 400
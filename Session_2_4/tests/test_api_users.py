@@ -12,3 +12,56 @@ def test_create_and_get_user(client):
     data2 = resp2.json()
     assert data2["id"] == user_id
     assert data2["email"] == "x@y.com"
+
+
+def test_list_users_paginated(client):
+    for i in range(3):
+        client.post("/users", json={"email": f"u{i}@y.com", "full_name": f"U {i}"})
+
+    page = client.get("/users?limit=2").json()
+    assert len(page["items"]) == 2
+    assert page["next_cursor"]
+
+    rest = client.get("/users", params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert len(rest["items"]) == 1
+    assert rest["next_cursor"] is None
+
+
+def test_bulk_create_users_ndjson(client):
+    client.post("/users", json={"email": "dup@y.com", "full_name": "Existing"})
+    body = "\n".join([
+        '{"email": "n1@y.com", "full_name": "N1"}',
+        '{"email": "dup@y.com", "full_name": "Dup"}',
+        '{"email": "n1@y.com", "full_name": "Dup in batch"}',
+        'not json',
+        '{"email": "n2@y.com", "full_name": "N2"}',
+    ])
+    resp = client.post("/users/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    data = resp.json()
+    assert [r["status"] for r in data["results"]] == ["created", "error", "error", "error", "created"]
+    assert data["results"][1]["detail"] == "Email already exists"
+
+    got = client.get(f"/users/{data['results'][4]['id']}").json()
+    assert got["email"] == "n2@y.com"
+
+
+def test_get_user_cached_including_absence(client):
+    assert client.get("/users/1").status_code == 404
+    uid = client.post("/users", json={"email": "c@y.com", "full_name": "C"}).json()["id"]
+    # Creating the user drops the cached 404 for its id
+    assert client.get(f"/users/{uid}").status_code == 200
+    before = client.get("/cache/stats").json()["hits"]
+    assert client.get(f"/users/{uid}").json()["email"] == "c@y.com"
+    assert client.get("/cache/stats").json()["hits"] == before + 1
+
+
+def test_user_etags(client):
+    uid = client.post("/users", json={"email": "e@y.com", "full_name": "E"}).json()["id"]
+    resp = client.get(f"/users/{uid}")
+    etag = resp.headers["ETag"]
+    assert client.get(f"/users/{uid}", headers={"If-None-Match": etag}).status_code == 304
+
+    list_etag = client.get("/users").headers["ETag"]
+    assert client.get("/users", headers={"If-None-Match": list_etag}).status_code == 304
+    client.post("/users", json={"email": "e2@y.com", "full_name": "E2"})
+    assert client.get("/users", headers={"If-None-Match": list_etag}).status_code == 200
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core import db as core_db
+from app.core.cache import cache
+from app.core.config import to_async_url
+from app.core.db import Base, ReadRouter, RoutingSession, get_db
+from app.main import app as fastapi_app
+
+REPLICA_URL = os.getenv("TEST_REPLICA_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not REPLICA_URL, reason="TEST_REPLICA_DATABASE_URL not set")
+
+
+@pytest.fixture
+def routed_client(client, monkeypatch):
+    # Two independent databases with no replication between them, so a read
+    # shows which one served it: rows written via the API exist only on the primary
+    Base.metadata.create_all(bind=create_engine(REPLICA_URL))
+    primary = create_async_engine(to_async_url(os.environ["TEST_DATABASE_URL"]), poolclass=NullPool)
+    replica = create_async_engine(to_async_url(REPLICA_URL), poolclass=NullPool)
+    maker = async_sessionmaker(bind=primary, sync_session_class=RoutingSession, expire_on_commit=False)
+    monkeypatch.setattr(core_db, "db_router", ReadRouter(maker, [replica], window=60))
+    monkeypatch.setattr(cache, "enabled", False)
+    fastapi_app.dependency_overrides.pop(get_db)
+    return client
+
+
+def test_reads_go_to_replica_except_within_own_write_window(routed_client):
+    c = routed_client
+    uid = c.post("/users", json={"email": "w@r.com", "full_name": "W"}, headers={"X-Client-Id": "writer"}).json()["id"]
+
+    # The writer reads its own write from the primary
+    assert c.get(f"/users/{uid}", headers={"X-Client-Id": "writer"}).status_code == 200
+    # Everyone else reads the (empty) replica
+    assert c.get(f"/users/{uid}", headers={"X-Client-Id": "other"}).status_code == 404
+    assert c.get("/users", headers={"X-Client-Id": "other"}).json()["items"] == []
+
+
+def test_replica_reads_do_not_populate_cache(routed_client, monkeypatch):
+    c = routed_client
+    monkeypatch.setattr(cache, "enabled", True)
+    uid = c.post("/users", json={"email": "c@r.com", "full_name": "C"}, headers={"X-Client-Id": "writer"}).json()["id"]
+
+    # Another client warms the lists from the lagging replica first
+    assert c.get("/users", headers={"X-Client-Id": "other"}).json()["items"] == []
+    assert c.get("/tasks", headers={"X-Client-Id": "other"}).json()["items"] == []
+    c.post("/tasks", json={"user_id": uid, "title": "t"}, headers={"X-Client-Id": "writer"})
+    assert c.get("/tasks", headers={"X-Client-Id": "other"}).json()["items"] == []
+
+    # The writer still reads its own writes
+    assert [u["id"] for u in c.get("/users", headers={"X-Client-Id": "writer"}).json()["items"]] == [uid]
+    assert len(c.get("/tasks", headers={"X-Client-Id": "writer"}).json()["items"]) == 1
+
+
+def test_delta_reads_stay_on_primary(routed_client):
+    c = routed_client
+    uid = c.post("/users", json={"email": "d@r.com", "full_name": "D"}, headers={"X-Client-Id": "writer"}).json()["id"]
+
+    # A replica watermark would let the client skip rows the replica hasn't applied
+    delta = c.get("/users", params={"since": "1970-01-01T00:00:00"}, headers={"X-Client-Id": "other"}).json()
+    assert [u["id"] for u in delta["items"]] == [uid]
@@ -0,0 +1,32 @@
+def test_write_paths_query_budget(client, query_budget):
+    uid = query_budget(client.post("/users", json={"email": "q@q.com", "full_name": "Q"}), 1).json()["id"]
+    assert query_budget(client.post("/users", json={"email": "q@q.com", "full_name": "Dup"}), 1).status_code == 409
+
+    tid = query_budget(client.post("/tasks", json={"user_id": uid, "title": "t"}), 2).json()["id"]
+    assert query_budget(client.post("/tasks", json={"user_id": uid + 1, "title": "t"}), 2).status_code == 404
+
+    query_budget(client.patch(f"/tasks/{tid}", json={"title": "renamed"}), 3)  # lock, version bump, UPDATE
+    assert query_budget(client.patch(f"/tasks/{tid}", json={"completed": True}), 3).json()["completed"] is True
+    query_budget(client.delete(f"/tasks/{tid}"), 3)
+
+    items = [{"user_id": uid, "title": f"b{i}"} for i in range(50)]
+    query_budget(client.post("/tasks/bulk", json=items), 3)
+    query_budget(client.patch("/tasks", params={"user_id": uid}, json={"completed": True}), 3)
+
+
+def test_read_paths_query_budget(client, query_budget):
+    uid = client.post("/users", json={"email": "r@q.com", "full_name": "R"}).json()["id"]
+    query_budget(client.get(f"/users/{uid}"), 1)
+    query_budget(client.get(f"/users/{uid}"), 0)  # cached
+    query_budget(client.get("/tasks", params={"user_id": uid}), 2)  # version for the ETag, then the page
+    query_budget(client.get("/tasks", params={"user_id": uid}), 0)
+    query_budget(client.get("/stats/tasks"), 2)
+
+
+def test_streamed_responses_log_query_total(client, caplog):
+    uid = client.post("/users", json={"email": "s@q.com", "full_name": "S"}).json()["id"]
+    client.post("/tasks", json={"user_id": uid, "title": "t"})
+    with caplog.at_level("INFO", logger="app.core.querycount"):
+        client.get("/tasks/export")
+    # The body queries after the headers are sent, so the total is logged
+    assert any("GET /tasks/export: 1 queries" in r.getMessage() for r in caplog.records)
@@ -1,10 +1,12 @@
+import pytest
 from app.models.user import User
 
-def test_create_user_persists(db_session):
+@pytest.mark.asyncio
+async def test_create_user_persists(db_session):
     u = User(email="a@b.com", full_name="Alice")
     db_session.add(u)
-    db_session.commit()
-    db_session.refresh(u)
+    await db_session.commit()
+    await db_session.refresh(u)
 
     assert u.id is not None
     assert u.email == "a@b.com"